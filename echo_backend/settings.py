@@ -134,5 +134,11 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Upstream school profile API
+SCHOOL_PROFILE_API_URL = os.environ.get(
+    "SCHOOL_PROFILE_API_URL",
+    "https://api.main.ezyschooling.com/api/v3/schools/{slug}/",
+)
+
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media').replace('\\', '/')
 MEDIA_URL = '/media/'
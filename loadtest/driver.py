@@ -0,0 +1,156 @@
+"""
+Concurrent load driver for the analyser endpoint.
+
+Start the stub upstream and the app, e.g.
+
+    python -m loadtest.stub_upstream --port 9000
+    SCHOOL_PROFILE_API_URL=http://127.0.0.1:9000/api/v3/schools/{slug}/ \\
+        gunicorn echo_backend.wsgi -w 4 -b 127.0.0.1:8000
+    # or: uvicorn echo_backend.asgi:application --workers 4 --port 8000
+
+then step through concurrency levels and save the results:
+
+    python -m loadtest.driver --base-url http://127.0.0.1:8000/api/tools \\
+        --concurrency 1,2,4,8,16,32 --duration 20 --db db.sqlite3 --label "wsgi x4" --out results.json
+    python -m loadtest.report results.json
+"""
+import argparse
+import json
+import sqlite3
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def count_scans(db_path):
+    if not db_path:
+        return None
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30) as conn:
+        return conn.execute("SELECT COUNT(*) FROM tools_schoolprofilescan").fetchone()[0]
+
+
+def scan_write_counters(base_url):
+    """Scan write counters from one app process, as exposed by the deep health check (a sample with several workers)."""
+    try:
+        counters = requests.get(f"{base_url}/health/deep/", timeout=10).json()["metrics"]["counters"]
+    except Exception:
+        return {}
+    return {name: value for name, value in counters.items() if name.startswith("scan.")}
+
+
+def classify(response):
+    if response.status_code < 400:
+        return "ok"
+    if response.status_code >= 500 and "database is locked" in response.text:
+        return "db_locked"
+    return f"http_{response.status_code}"
+
+
+def run_step(base_url, path, slugs, concurrency, duration, timeout):
+    deadline = time.monotonic() + duration
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+    counter = iter(range(10**12))
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with lock:
+                slug = slugs[next(counter) % len(slugs)]
+            started = time.monotonic()
+            try:
+                outcome = classify(session.get(f"{base_url}{path.format(slug=slug)}", timeout=timeout))
+            except requests.RequestException as e:
+                outcome = type(e).__name__
+            elapsed = time.monotonic() - started
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "ok":
+                    latencies.append(elapsed * 1000)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.monotonic() - started
+
+    total = sum(outcomes.values())
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 2),
+        "rps": round(outcomes["ok"] / elapsed, 2) if elapsed else 0,
+        "error_rate": round(1 - outcomes["ok"] / total, 4) if total else None,
+        "outcomes": dict(outcomes),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies), 1) if latencies else None,
+            "p50": round(percentile(latencies, 50), 1) if latencies else None,
+            "p90": round(percentile(latencies, 90), 1) if latencies else None,
+            "p99": round(percentile(latencies, 99), 1) if latencies else None,
+            "max": round(max(latencies), 1) if latencies else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/tools")
+    parser.add_argument("--path", default="/analyser/{slug}/", help="Request path template.")
+    parser.add_argument("--slugs", type=int, default=500, help="Number of synthetic slugs to cycle through.")
+    parser.add_argument("--slug-file", help="File with one slug per line (overrides --slugs).")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level.")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--db", help="Path to the app's SQLite file, to count scan rows written per step.")
+    parser.add_argument("--label", default="", help="Free-form label, e.g. 'wsgi gunicorn -w 4'.")
+    parser.add_argument("--out", default="loadtest_results.json")
+    options = parser.parse_args(argv)
+
+    if options.slug_file:
+        with open(options.slug_file) as f:
+            slugs = [line.strip() for line in f if line.strip()]
+    else:
+        slugs = [f"loadtest-school-{i}" for i in range(options.slugs)]
+
+    steps = []
+    for concurrency in [int(c) for c in options.concurrency.split(",")]:
+        rows_before = count_scans(options.db)
+        writes_before = scan_write_counters(options.base_url)
+
+        step = run_step(options.base_url, options.path, slugs, concurrency, options.duration, options.timeout)
+
+        rows_after = count_scans(options.db)
+        writes_after = scan_write_counters(options.base_url)
+        step["db"] = {
+            "rows_written": rows_after - rows_before if rows_before is not None else None,
+            "locked_responses": step["outcomes"].get("db_locked", 0),
+            "sampled_process": {
+                name: value - writes_before.get(name, 0) for name, value in writes_after.items()
+            },
+        }
+        steps.append(step)
+        print(
+            f"c={concurrency:<4} rps={step['rps']:<8} p50={step['latency_ms']['p50']}ms "
+            f"p99={step['latency_ms']['p99']}ms errors={step['error_rate']} rows={step['db']['rows_written']}"
+        )
+
+    with open(options.out, "w") as f:
+        json.dump({"label": options.label, "base_url": options.base_url, "path": options.path, "steps": steps}, f, indent=2)
+    print(f"Saved {options.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Summarise one or more driver result files.
+
+    python -m loadtest.report wsgi.json asgi.json [--csv curve.csv]
+
+Prints the throughput vs latency curve per run, error rates and DB write
+contention, and the concurrency at which adding load stops adding throughput.
+"""
+import argparse
+import csv
+import json
+
+
+BAR_WIDTH = 40
+
+
+def knee(steps, min_gain=0.10):
+    """Highest concurrency that still improved throughput by at least `min_gain` without new errors."""
+    best = steps[0]
+    for previous, step in zip(steps, steps[1:]):
+        gained = step["rps"] >= previous["rps"] * (1 + min_gain)
+        if not gained or (step["error_rate"] or 0) > (previous["error_rate"] or 0) + 0.01:
+            break
+        best = step
+    return best
+
+
+def print_run(run):
+    steps = run["steps"]
+    peak = max(step["rps"] for step in steps) or 1
+
+    print(f"\n== {run.get('label') or run['base_url']} ({run['path']})")
+    print(f"{'conc':>5} {'rps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7} {'locked':>7} {'rows':>6}  throughput")
+    for step in steps:
+        latency = step["latency_ms"]
+        bar = "#" * int(step["rps"] / peak * BAR_WIDTH)
+        print(
+            f"{step['concurrency']:>5} {step['rps']:>8} {latency['p50'] or '-':>8} {latency['p90'] or '-':>8} "
+            f"{latency['p99'] or '-':>8} {(step['error_rate'] or 0) * 100:>6.1f}% "
+            f"{step['db']['locked_responses']:>7} {step['db']['rows_written'] if step['db']['rows_written'] is not None else '-':>6}  {bar}"
+        )
+
+    best = knee(steps)
+    print(
+        f"Throughput levels off around concurrency {best['concurrency']} "
+        f"({best['rps']} req/s, p99 {best['latency_ms']['p99']} ms). "
+        "Size workers per node for that level and scale out beyond it."
+    )
+    locked = sum(step["db"]["locked_responses"] for step in steps)
+    if locked:
+        print(f"{locked} responses failed with 'database is locked': SQLite write contention is the limit.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("results", nargs="+")
+    parser.add_argument("--csv", help="Also write every step of every run to this CSV file.")
+    options = parser.parse_args(argv)
+
+    runs = []
+    for path in options.results:
+        with open(path) as f:
+            runs.append(json.load(f))
+
+    for run in runs:
+        print_run(run)
+
+    if options.csv:
+        with open(options.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["label", "concurrency", "rps", "p50_ms", "p90_ms", "p99_ms", "error_rate", "locked_responses", "rows_written"])
+            for run in runs:
+                for step in run["steps"]:
+                    writer.writerow([
+                        run.get("label"), step["concurrency"], step["rps"], step["latency_ms"]["p50"],
+                        step["latency_ms"]["p90"], step["latency_ms"]["p99"], step["error_rate"],
+                        step["db"]["locked_responses"], step["db"]["rows_written"],
+                    ])
+        print(f"\nSaved {options.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Local stand-in for the upstream school profile API.
+
+    python -m loadtest.stub_upstream --port 9000 --latency-ms 80 --jitter-ms 40 --error-rate 0.01
+
+Point the backend at it with
+    SCHOOL_PROFILE_API_URL=http://127.0.0.1:9000/api/v3/schools/{slug}/
+
+Serves recorded payloads from --payload-dir (<slug>.json) when present,
+otherwise a synthetic profile generated deterministically from the slug.
+Synthetic image URLs point back at this server (/media/<slug>/<n>.jpg) and a
+fixed share of them are missing, thumbnail-sized or repeats of another photo.
+"""
+import argparse
+import functools
+import hashlib
+import io
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+
+SCHOOL_PATH_RE = re.compile(r"^/api/v3/schools/(?P<slug>[-\w]+)/?$")
+MEDIA_PATH_RE = re.compile(r"^/media/(?P<slug>[-\w]+)/(?P<index>\d+)\.jpg$")
+
+# Share of synthetic images that are missing, too small to count, or a repeat of another photo
+MEDIA_BROKEN_RATE = 0.05
+MEDIA_TINY_RATE = 0.10
+MEDIA_DUPLICATE_RATE = 0.10
+
+BOARDS = ["CBSE", "ICSE", "IB", "IGCSE", "State Board"]
+FORMATS = ["Day School", "Boarding School", "Day cum Boarding"]
+DISTRICTS = ["South Delhi", "North Delhi", "Gurugram", "Noida", "Faridabad", "Ghaziabad"]
+WORDS = (
+    "students learning holistic development campus faculty values excellence sports "
+    "library laboratory curriculum innovation community activities discipline creativity "
+    "leadership science arts music values safety transport smart classrooms"
+).split()
+
+
+def synthetic_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def seeded(*parts):
+    return random.Random(int(hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()[:8], 16))
+
+
+def media_kind(slug, index):
+    roll = seeded(slug, index, "kind").random()
+    if roll < MEDIA_BROKEN_RATE:
+        return "broken"
+    if roll < MEDIA_BROKEN_RATE + MEDIA_TINY_RATE:
+        return "tiny"
+    if index and roll < MEDIA_BROKEN_RATE + MEDIA_TINY_RATE + MEDIA_DUPLICATE_RATE:
+        return "duplicate"
+    return "photo"
+
+
+@functools.lru_cache(maxsize=512)
+def synthetic_image(slug, index, size=(800, 600)):
+    """JPEG bytes of a random-shapes picture; the same (slug, index) always gives the same image."""
+    rng = seeded(slug, index, "image")
+    image = Image.new("RGB", size, tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randint(0, size[0]), rng.randint(0, size[1])
+        w, h = rng.randint(20, size[0] // 2), rng.randint(20, size[1] // 2)
+        draw.rectangle((x, y, x + w, y + h), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    body = io.BytesIO()
+    image.save(body, "JPEG", quality=80)
+    return body.getvalue()
+
+
+def synthetic_media(slug, index):
+    """Image bytes for /media/<slug>/<index>.jpg, or None for a missing image."""
+    kind = media_kind(slug, index)
+    if kind == "broken":
+        return None
+    if kind == "tiny":
+        return synthetic_image(slug, index, size=(160, 120))
+    if kind == "duplicate":
+        return synthetic_image(slug, 0)
+    return synthetic_image(slug, index)
+
+
+def synthetic_school(slug, media_scale=1.0, media_base="https://cdn.example.com/media"):
+    rng = seeded(slug)
+    counter = iter(range(10**6))
+    media = lambda low, high: [
+        {"id": i, "image": f"{media_base}/{slug}/{i}.jpg"}
+        for i in (next(counter) for _ in range(int(rng.randint(low, high) * media_scale)))
+    ]
+    classes = ["Nursery", "KG"] + [f"Class {i}" for i in range(1, 13)]
+    session = "2025-26"
+
+    return {
+        "name": slug.replace("-", " ").title(),
+        "slug": slug,
+        "short_name": slug[:8].upper(),
+        "logo": f"https://cdn.example.com/{slug}/logo.png" if rng.random() < 0.9 else None,
+        "email": f"info@{slug}.example.com" if rng.random() < 0.8 else None,
+        "phone_no": "+91 11 5555 0000",
+        "website": f"https://{slug}.example.com" if rng.random() < 0.7 else None,
+        "boards": rng.sample(BOARDS, rng.randint(1, 2)),
+        "classes_offered": "Nursery - Class 12",
+        "medium": "English",
+        "languages_taught": ["English", "Hindi"],
+        "academic_session": session,
+        "student_teacher_ratio": f"{rng.randint(10, 35)}:1",
+        "format": rng.choice(FORMATS),
+        "about": synthetic_text(rng, rng.randint(20, 250)),
+        "usp": synthetic_text(rng, rng.randint(0, 120)),
+        "awards": synthetic_text(rng, rng.randint(0, 120)),
+        "pre_post_admission_process": synthetic_text(rng, rng.randint(0, 60)),
+        "withdrawl_policy": synthetic_text(rng, rng.randint(0, 30)),
+        "scholarship": synthetic_text(rng, rng.randint(0, 30)),
+        "life_at_school": synthetic_text(rng, rng.randint(0, 40)),
+        "infra_and_facilities": synthetic_text(rng, rng.randint(0, 40)),
+        "leader_messages": [{"name": "Principal", "message": synthetic_text(rng, 80)} for _ in range(rng.randint(0, 3))],
+        "events": [{"title": synthetic_text(rng, 5), "description": synthetic_text(rng, 60)} for _ in range(rng.randint(0, 20))],
+        "news": [{"title": synthetic_text(rng, 6), "body": synthetic_text(rng, 80)} for _ in range(rng.randint(0, 20))],
+        "gallery": {
+            "images": media(0, 120),
+            "videos": [{"url": f"https://video.example.com/{slug}/{i}"} for i in range(rng.randint(0, 6))],
+            "display_images": media(0, 8),
+            "virtual_tour": f"https://tour.example.com/{slug}" if rng.random() < 0.3 else None,
+        },
+        "infrastruture": [
+            {"name": f"Facility {i}", "description": synthetic_text(rng, 30), "images": media(0, 15)}
+            for i in range(rng.randint(0, 12))
+        ],
+        "feature_facilities": [
+            {"category": f"Category {i}", "features": [{"name": rng.choice(WORDS)} for _ in range(rng.randint(1, 8))]}
+            for i in range(rng.randint(0, 5))
+        ],
+        "classes": [{"name": name} for name in classes],
+        "internal": {"selected_session": session},
+        "fees_structure": {
+            session: [
+                {"class": name, "monthly_fee": rng.choice([0, rng.randint(2000, 20000)]), "cost_of_year_for_new_admission": 0}
+                for name in classes
+            ],
+        },
+        "admissions": {
+            "documents": ["Birth certificate", "Address proof"] if rng.random() < 0.7 else [],
+            "school_timings": "8:00 AM - 2:00 PM",
+            "openSession": session if rng.random() < 0.6 else None,
+        },
+        "address": {
+            "adress_1": f"{rng.randint(1, 200)} Main Road",
+            "area": f"Sector {rng.randint(1, 60)}",
+            "district": rng.choice(DISTRICTS),
+            "state": "Delhi NCR",
+            "pincode": str(rng.randint(110001, 110099)),
+            "latitude": round(28.4 + rng.random() * 0.4, 6),
+            "longitude": round(77.0 + rng.random() * 0.4, 6),
+        },
+        "verified_by_school": rng.random() < 0.5,
+        "year_of_establishment": rng.randint(1950, 2020),
+        "built_in_area": f"{rng.randint(1, 15)} acre",
+        "number_of_students": rng.randint(300, 4000),
+        "brochure": f"https://cdn.example.com/{slug}/brochure.pdf" if rng.random() < 0.4 else None,
+        "views": rng.randint(0, 50000),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "SchoolAPIStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode(), "application/json")
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_json(200, {"status": "ok"})
+
+    def send_media(self, slug, index):
+        body = synthetic_media(slug, index)
+        if body is None:
+            return self.send_json(404, {"detail": "Not found."})
+        return self.send_body(200, body, "image/jpeg")
+
+    def do_GET(self):
+        options = self.server.options
+        path = self.path.split("?")[0]
+        media = MEDIA_PATH_RE.match(path)
+        if media:
+            return self.send_media(media.group("slug"), int(media.group("index")))
+
+        match = SCHOOL_PATH_RE.match(path)
+        if not match:
+            return self.send_json(404, {"detail": "Not found."})
+
+        delay = max(0.0, random.gauss(options.latency_ms, options.jitter_ms) / 1000)
+        time.sleep(delay)
+
+        roll = random.random()
+        if roll < options.error_rate:
+            return self.send_json(500, {"detail": "Simulated upstream error."})
+        if roll < options.error_rate + options.not_found_rate:
+            return self.send_json(404, {"detail": "Not found."})
+
+        slug = match.group("slug")
+        recorded = options.payload_dir / f"{slug}.json" if options.payload_dir else None
+        if recorded and recorded.exists():
+            return self.send_json(200, json.loads(recorded.read_text()))
+        media_base = f"http://{self.headers.get('Host') or self.server.server_address[0]}/media"
+        return self.send_json(200, synthetic_school(slug, media_scale=options.media_scale, media_base=media_base))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean added latency per request.")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Standard deviation of the added latency.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500.")
+    parser.add_argument("--not-found-rate", type=float, default=0.0, help="Fraction of requests answered with 404.")
+    parser.add_argument("--media-scale", type=float, default=1.0, help="Multiplier for synthetic image counts.")
+    parser.add_argument("--payload-dir", type=Path, help="Directory of recorded <slug>.json payloads.")
+    parser.add_argument("--verbose", action="store_true")
+    options = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((options.host, options.port), StubHandler)
+    server.daemon_threads = True
+    server.options = options
+    print(f"Stub school API on http://{options.host}:{options.port}/api/v3/schools/<slug>/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
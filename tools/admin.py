@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
 from tools.models.base import Tool
 from tools.models.analyser import SchoolProfileScan
+from tools.utils.scan_analytics import get_scan_analytics
 # from tools.models.meta import MetaTagScan
 # from tools.models.schema import SchemaScan
 
@@ -15,6 +18,50 @@ class SchoolProfileScanAdmin(admin.ModelAdmin):
     list_display = ('slug', 'score', 'created_at')
     search_fields = ('slug',)
     ordering = ('-created_at',)
+    show_full_result_count = False
+    change_list_template = 'admin/tools/schoolprofilescan/change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        # Case-sensitive slug prefix as a range, which can use the (slug, created_at) index;
+        # istartswith compiles to a LIKE that SQLite answers with a full table scan
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(slug__gte=search_term, slug__lt=search_term + '\uffff'), False
+
+    def get_queryset(self, request):
+        # The analysis and features JSON are only needed on the change form, where they are loaded on access
+        return super().get_queryset(request).defer('analysis', 'features')
+
+    def get_urls(self):
+        urls = [
+            path(
+                'analytics/',
+                self.admin_site.admin_view(self.analytics_view),
+                name='tools_schoolprofilescan_analytics',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def analytics_view(self, request):
+        try:
+            days = min(max(int(request.GET.get('days', 30)), 1), 365)
+        except ValueError:
+            days = 30
+        summary = get_scan_analytics(days)
+        peak_bucket = max((bucket['count'] for bucket in summary['histogram']), default=0) or 1
+        peak_day = max((day['count'] for day in summary['volume']), default=0) or 1
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'School scan analytics',
+            'opts': self.model._meta,
+            'summary': summary,
+            'histogram': [{**bucket, 'width': round(bucket['count'] / peak_bucket * 100)} for bucket in summary['histogram']],
+            'volume': [{**day, 'width': round(day['count'] / peak_day * 100)} for day in summary['volume']],
+            'day_choices': [7, 30, 90, 365],
+        }
+        return TemplateResponse(request, 'admin/tools/schoolprofilescan/analytics.html', context)
 
 # @admin.register(MetaTagScan)
 # class MetaTagScanAdmin(admin.ModelAdmin):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ToolsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tools'
+
+    def ready(self):
+        from tools import signals  # noqa: F401
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.utils.retention import RETENTION_DAILY_DAYS, RETENTION_KEEP_ALL_DAYS, compact_scans
+
+
+def megabytes(value):
+    return f"{value / 1024 / 1024:.1f} MB" if value is not None else "-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old school profile scans: keep every scan for --keep-all-days, the last scan per day "
+        "until --daily-days, then the last scan per week. The first, the latest and every scan where "
+        "the score changed are always kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-all-days", type=int, default=RETENTION_KEEP_ALL_DAYS)
+        parser.add_argument("--daily-days", type=int, default=RETENTION_DAILY_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500, help="Scans deleted per transaction.")
+        parser.add_argument("--sleep", type=float, default=0.1, help="Seconds to pause between batches.")
+        parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM on SQLite.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        if options["keep_all_days"] < 0 or options["daily_days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--keep-all-days and --daily-days must be >= 0 and --batch-size >= 1")
+
+        report = compact_scans(
+            keep_all_days=options["keep_all_days"],
+            daily_days=options["daily_days"],
+            batch_size=options["batch_size"],
+            pause=options["sleep"],
+            vacuum=not options["no_vacuum"],
+            dry_run=options["dry_run"],
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {report['to_delete']} of {report['examined']} scans")
+            return
+
+        reclaimed = None
+        if report["file_bytes_before"] is not None and report["file_bytes_after"] is not None:
+            reclaimed = report["file_bytes_before"] - report["file_bytes_after"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {report['deleted']} of {report['examined']} scans "
+            f"({megabytes(report['analysis_bytes_deleted'])} of analysis data); "
+            f"database file {megabytes(report['file_bytes_before'])} -> {megabytes(report['file_bytes_after'])}, "
+            f"reclaimed {megabytes(reclaimed)}"
+        ))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.utils.analyser import RULES_VERSION
+from tools.utils.rescoring import rescore_scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-score stored school profile scans under the current scoring rules from the features "
+        "saved with each scan, without fetching anything. Scans saved before features were "
+        "recorded are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Only re-score these schools.")
+        parser.add_argument("--force", action="store_true", help="Also re-score scans already at the current rules version.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Scans written per transaction.")
+        parser.add_argument("--no-rollups", action="store_true", help="Skip rebuilding the score rollups.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how scores would change.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+
+        report = rescore_scans(
+            slugs=options["slugs"] or None,
+            force=options["force"],
+            batch_size=options["batch_size"],
+            rollups=not options["no_rollups"],
+            dry_run=options["dry_run"],
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+
+        summary = (
+            f"{report['rescored']} of {report['examined']} scans to rules version {RULES_VERSION}; "
+            f"{report['changed']} scores changed (mean {report['mean_change']}, max {report['max_change']}); "
+            f"skipped {report['skipped_current']} already current and {report['skipped_no_features']} without features"
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Would re-score {summary}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Re-scored {summary}"))
+        if report["rollups_written"] is not None:
+            self.stdout.write(f"Rebuilt {report['rollups_written']} rollup rows from {report['rollups_since']}")
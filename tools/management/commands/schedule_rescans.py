@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from tools.utils.scheduler import RESCAN_BUDGET_PER_MINUTE, RescanScheduler
+
+
+class Command(BaseCommand):
+    help = "Re-scan school profiles when they are due, based on how often each one changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=int, default=RESCAN_BUDGET_PER_MINUTE, help="Upstream requests allowed per minute.")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent scans.")
+        parser.add_argument("--once", action="store_true", help="Scan whatever is due now, then exit.")
+        parser.add_argument("--show", type=int, metavar="N", help="Print the next N due schools and exit.")
+
+    def handle(self, *args, **options):
+        scheduler = RescanScheduler(
+            budget_per_minute=options["budget"],
+            workers=options["workers"],
+            stdout=self.stdout,
+        )
+
+        if options["show"]:
+            scheduler.load()
+            for due_at, slug in scheduler.upcoming(options["show"]):
+                self.stdout.write(f"{due_at:%Y-%m-%d %H:%M}  {slug}")
+            return
+
+        scheduler.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Re-scanned {scheduler.scanned} schools"))
@@ -0,0 +1,71 @@
+import gzip
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.utils.batch_scoring import CSVWriter, JSONLinesWriter, ParquetWriter, Progress, score_stream
+
+
+def open_text(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="" if "w" in mode else None)
+    return open(path, mode, encoding="utf-8", newline="" if "w" in mode else None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Score a JSONL dump of school profiles (one upstream document per line) offline: "
+        "no database or network access, scored on a process pool."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSONL file (.gz ok), or - for stdin.")
+        parser.add_argument("-o", "--output", default="-", help="Output file (.gz ok for jsonl/csv), or - for stdout.")
+        parser.add_argument("--format", choices=["jsonl", "csv", "parquet"], default="jsonl")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes.")
+        parser.add_argument("--chunk-size", type=int, default=64, help="Lines per task sent to a worker.")
+        parser.add_argument("--unordered", action="store_true", help="Write results as they finish instead of in input order.")
+        parser.add_argument("--full", action="store_true", help="Include the whole analysis (jsonl only).")
+        parser.add_argument("--limit", type=int, help="Stop after this many input lines.")
+
+    def handle(self, *args, **options):
+        if options["full"] and options["format"] != "jsonl":
+            raise CommandError("--full is only supported with --format jsonl")
+        if options["format"] == "parquet" and options["output"] == "-":
+            raise CommandError("Parquet output needs a file path")
+
+        source = open_text(options["input"], "r")
+        if options["format"] == "parquet":
+            try:
+                writer = ParquetWriter(options["output"])
+            except ImportError:
+                raise CommandError("Parquet output needs pyarrow installed; use --format csv instead")
+        else:
+            target = open_text(options["output"], "w")
+            writer = (CSVWriter if options["format"] == "csv" else JSONLinesWriter)(target)
+
+        progress = Progress(report=lambda message: self.stderr.write(message))
+        try:
+            rows = score_stream(
+                source,
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+                ordered=not options["unordered"],
+                full=options["full"],
+                limit=options["limit"],
+            )
+            for row in rows:
+                writer.write(row)
+                progress.update(row)
+        finally:
+            writer.close()
+            if options["output"] != "-" and options["format"] != "parquet":
+                target.close()
+            if source is not sys.stdin:
+                source.close()
+
+        self.stderr.write(self.style.SUCCESS(f"Scored {progress.summary()}"))
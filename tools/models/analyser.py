@@ -5,6 +5,63 @@ class SchoolProfileScan(TimeStampedModel):
     slug = models.CharField(max_length=255)
     score = models.PositiveIntegerField(blank=True, null=True)
     analysis = models.JSONField(default=dict, blank=True)
+    # Inputs the scoring rules read, so the scan can be re-scored offline (see rescore_scans)
+    features = models.JSONField(null=True, blank=True)
+    rules_version = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["slug", "-created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.slug} - {self.score}"
+
+
+class ContentSignature(TimeStampedModel):
+    scan = models.ForeignKey(SchoolProfileScan, on_delete=models.CASCADE, related_name="content_signatures")
+    slug = models.CharField(max_length=255, db_index=True)
+    field = models.CharField(max_length=50)
+    signature = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.slug} - {self.field}"
+
+
+class ContentSignatureBand(models.Model):
+    # LSH buckets are only kept for the latest signature of each slug
+    signature = models.ForeignKey(ContentSignature, on_delete=models.CASCADE, related_name="bands")
+    field = models.CharField(max_length=50)
+    bucket = models.CharField(max_length=32)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["field", "bucket"]),
+        ]
+
+
+class ScoreRollup(models.Model):
+    DIMENSION_CHOICES = [
+        ("district", "District"),
+        ("board", "Board"),
+        ("format", "School type"),
+    ]
+
+    day = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+    sums = models.JSONField(default=dict, blank=True)  # metric -> sum of values
+    histograms = models.JSONField(default=dict, blank=True)  # metric -> counts per whole score point 0-100
+    version = models.PositiveIntegerField(default=0)  # bumped on every incremental update
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("day", "dimension", "key")
+        indexes = [
+            models.Index(fields=["dimension", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.dimension}={self.key} ({self.count})"
@@ -27,9 +27,11 @@ class Tool(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             base_slug = slugify(self.name)
+            # One query for every slug that could collide, then pick the first free suffix
+            taken = set(Tool.objects.filter(slug__startswith=base_slug).values_list("slug", flat=True))
             slug = base_slug
             counter = 1
-            while Tool.objects.filter(slug=slug).exists():
+            while slug in taken:
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tools.models import SchoolProfileScan
+from tools.models.base import Tool
+from tools.utils.rollups import record_scan
+from tools.utils.scan_events import publish_scan
+from tools.utils.tool_registry import invalidate_tool_registry
+
+
+@receiver(post_save, sender=SchoolProfileScan)
+def update_score_rollups(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_scan(instance)
+
+
+@receiver(post_save, sender=SchoolProfileScan)
+def publish_scan_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: publish_scan(instance))
+
+
+@receiver(post_save, sender=Tool)
+@receiver(post_delete, sender=Tool)
+def invalidate_tool_list(sender, **kwargs):
+    invalidate_tool_registry()
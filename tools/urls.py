@@ -1,12 +1,31 @@
 from django.urls import path
 
-from tools.views.base import HealthCheckAPIView, ToolListAPIView
+from tools.views.base import (
+    DeepHealthCheckAPIView,
+    HealthCheckAPIView,
+    LivenessAPIView,
+    MetricsAPIView,
+    ReadinessAPIView,
+    ToolListAPIView,
+)
 from .views import analyser, reviewer
+from .views.stream import ScanEventStreamView
 
 urlpatterns = [
     path('health/', HealthCheckAPIView.as_view(), name='health-check'),
+    path('health/live/', LivenessAPIView.as_view(), name='health-live'),
+    path('health/ready/', ReadinessAPIView.as_view(), name='health-ready'),
+    path('health/deep/', DeepHealthCheckAPIView.as_view(), name='health-deep'),
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
     path('all/', ToolListAPIView.as_view(), name='tool-list'),
+    path('analyser/compare/', analyser.SchoolComparisonAPIView.as_view(), name='school-analyser-compare'),
+    path('analyser/stream/', ScanEventStreamView.as_view(), name='school-analyser-stream'),
+    path('analyser/notifications/', analyser.ChangeNotificationAPIView.as_view(), name='school-analyser-notifications'),
+    path('analyser/simulate-weights/', analyser.WeightSimulationAPIView.as_view(), name='school-analyser-simulate-weights'),
+    path('analyser/nearby/', analyser.NearbySchoolsAPIView.as_view(), name='school-analyser-nearby'),
+    path('analyser/aggregates/', analyser.ScoreAggregatesAPIView.as_view(), name='school-analyser-aggregates'),
     path('analyser/<slug:slug>/', analyser.SchoolAnalyserAPIView.as_view(), name='school-analyser'),
+    path('analyser/<slug:slug>/duplicates/', analyser.SchoolDuplicatesAPIView.as_view(), name='school-analyser-duplicates'),
     path('reviewer/login/', reviewer.EzyschoolingLoginView.as_view(), name='school-reviewer-login'),
     path('reviewer/upload/', reviewer.ReviewUploadExcelView.as_view(), name='reviewer-upload'),
 ]
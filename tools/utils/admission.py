@@ -0,0 +1,217 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from tools.utils import metrics
+from tools.utils.ratelimit import TokenBucket
+
+
+# Lanes in priority order: a lane only admits work when no higher lane has requests waiting
+ADMISSION_LANES = getattr(settings, "ADMISSION_LANES", {
+    "interactive": {"concurrency": 8, "queue_size": 32, "max_wait_seconds": 2, "rate_per_minute": 60, "burst": 10},
+    "batch": {"concurrency": 2, "queue_size": 64, "max_wait_seconds": 15, "rate_per_minute": 120, "burst": 20},
+})
+DEFAULT_LANE = list(ADMISSION_LANES)[0]
+# X-Api-Key -> lane for known bulk callers (e.g. {"<key>": "batch"}); everyone else is interactive
+ADMISSION_CLIENT_LANES = getattr(settings, "ADMISSION_CLIENT_LANES", {})
+# REMOTE_ADDRs of our own reverse proxies, whose X-Forwarded-For is believed. Without
+# them, all clients behind a proxy share the proxy's rate-limit bucket
+ADMISSION_TRUSTED_PROXIES = set(getattr(settings, "ADMISSION_TRUSTED_PROXIES", ()))
+ADMISSION_LANES_ORDER = list(ADMISSION_LANES)
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after, lane):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.lane = lane
+
+
+class AdmissionController:
+    def __init__(self, lanes=ADMISSION_LANES):
+        self.lanes = lanes
+        self.order = list(lanes)
+        self.active = {lane: 0 for lane in lanes}
+        self.waiting = {lane: 0 for lane in lanes}
+        self.service_time = {lane: 0.5 for lane in lanes}  # EWMA of seconds per request
+        self.buckets = OrderedDict()
+        self._condition = threading.Condition()
+
+        for lane in lanes:
+            metrics.register_gauge(f"admission.{lane}.active", lambda lane=lane: self.active[lane])
+            metrics.register_gauge(f"admission.{lane}.depth", lambda lane=lane: self.waiting[lane])
+
+    def bucket_for(self, lane, client):
+        key = (lane, client)
+        with self._condition:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                config = self.lanes[lane]
+                bucket = TokenBucket(rate=config["rate_per_minute"] / 60, capacity=config["burst"])
+                self.buckets[key] = bucket
+                if len(self.buckets) > MAX_TRACKED_CLIENTS:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            return bucket
+
+    def _can_start(self, lane):
+        if self.active[lane] >= self.lanes[lane]["concurrency"]:
+            return False
+        higher = self.order[:self.order.index(lane)]
+        return not any(self.waiting[other] for other in higher)
+
+    def _estimated_wait(self, lane):
+        config = self.lanes[lane]
+        return self.service_time[lane] * (self.waiting[lane] + 1) / config["concurrency"]
+
+    def reject(self, lane, reason, retry_after):
+        metrics.incr(f"admission.{lane}.rejected_{reason}")
+        raise AdmissionRejected(reason, retry_after, lane)
+
+    def acquire(self, lane, client, max_wait=None):
+        config = self.lanes[lane]
+
+        wait = self.bucket_for(lane, client).try_acquire()
+        if wait:
+            self.reject(lane, "rate_limited", wait)
+
+        max_wait = config["max_wait_seconds"] if max_wait is None else min(max_wait, config["max_wait_seconds"])
+        deadline = time.monotonic() + max_wait
+
+        with self._condition:
+            if not self._can_start(lane):
+                if self.waiting[lane] >= config["queue_size"]:
+                    self.reject(lane, "saturated", self._estimated_wait(lane))
+
+                self.waiting[lane] += 1
+                try:
+                    while not self._can_start(lane):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.reject(lane, "timeout", self._estimated_wait(lane))
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting[lane] -= 1
+                    # Lower lanes may have been held back by this request waiting
+                    self._condition.notify_all()
+
+            self.active[lane] += 1
+        metrics.incr(f"admission.{lane}.admitted")
+        return time.monotonic()
+
+    def release(self, lane, started):
+        with self._condition:
+            self.active[lane] -= 1
+            self.service_time[lane] = 0.8 * self.service_time[lane] + 0.2 * (time.monotonic() - started)
+            self._condition.notify_all()
+
+
+admission_controller = AdmissionController()
+
+
+def is_authenticated(request):
+    user = getattr(request, "user", None)
+    return user is not None and user.is_authenticated
+
+
+def request_api_key(request):
+    key = request.headers.get("X-Api-Key")
+    return key if key in ADMISSION_CLIENT_LANES else None
+
+
+def request_lane(request):
+    """
+    The lane is decided by the server: the one configured for the caller's API
+    key, else DEFAULT_LANE. X-Scan-Priority (or ?priority=) can only move a
+    request to a lower-priority lane.
+    """
+    key = request_api_key(request)
+    lane = ADMISSION_CLIENT_LANES[key] if key else DEFAULT_LANE
+    lane = lane if lane in ADMISSION_LANES else DEFAULT_LANE
+    requested = request.headers.get("X-Scan-Priority") or request.GET.get("priority")
+    if requested in ADMISSION_LANES and ADMISSION_LANES_ORDER.index(requested) > ADMISSION_LANES_ORDER.index(lane):
+        return requested
+    return lane
+
+
+def client_address(request):
+    """
+    The peer address, or behind trusted proxies the last X-Forwarded-For hop
+    they did not add; client-supplied hops further left are ignored.
+    """
+    address = request.META.get("REMOTE_ADDR")
+    if address in ADMISSION_TRUSTED_PROXIES:
+        hops = [hop.strip() for hop in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if hop.strip()]
+        while hops and address in ADMISSION_TRUSTED_PROXIES:
+            address = hops.pop()
+    return address
+
+
+def request_client(request):
+    # Only identities the client cannot mint at will, so a new header never means a fresh bucket
+    key = request_api_key(request)
+    if key:
+        return f"key:{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+    if is_authenticated(request):
+        return f"user:{request.user.pk}"
+    return f"ip:{client_address(request)}"
+
+
+def request_max_wait(request):
+    try:
+        return float(request.headers["X-Request-Deadline-Ms"]) / 1000
+    except (KeyError, ValueError):
+        return None
+
+
+@contextmanager
+def admitted(request):
+    """Hold an admission slot for the request; raises AdmissionRejected when it cannot get one in time."""
+    lane = request_lane(request)
+    started = admission_controller.acquire(lane, request_client(request), request_max_wait(request))
+    try:
+        yield
+    finally:
+        admission_controller.release(lane, started)
+
+
+def rejection_response(rejection):
+    response = JsonResponse(
+        {"error": "Too many requests", "reason": rejection.reason, "lane": rejection.lane, "retry_after": rejection.retry_after},
+        status=429,
+    )
+    response["Retry-After"] = str(rejection.retry_after)
+    return response
+
+
+class AdmissionControlMixin:
+    """
+    Puts an APIView behind the admission controller: per-client rate limits and
+    a concurrency-capped priority lane, answering 429 with Retry-After when the
+    request cannot be admitted in time. Clients are told apart by configured
+    API key, user or address (see ADMISSION_TRUSTED_PROXIES); bulk callers are
+    put in their lane by ADMISSION_CLIENT_LANES.
+    """
+
+    def admission_exempt(self, request):
+        """Requests cheap enough to skip admission control (they may still use `admitted()` for expensive parts)."""
+        return False
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.admission_exempt(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        try:
+            with admitted(request):
+                return super().dispatch(request, *args, **kwargs)
+        except AdmissionRejected as e:
+            return rejection_response(e)
@@ -1,8 +1,17 @@
 
+import time
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import OperationalError
+from django.db.models import Max
 from django.utils.timezone import now
 from tools.models import SchoolProfileScan
+from tools.utils import metrics
+from tools.utils.geo import benchmark_against_neighbours, index_scan_location
+from tools.utils.media_checker import MEDIA_CHECK_ENABLED, MIN_IMAGE_HEIGHT, MIN_IMAGE_WIDTH, check_profile_media
+from tools.utils.profile_loader import load_school_profile
+from tools.utils.similarity import compute_content_signatures, find_near_duplicates, store_content_signatures
+import requests
 
 
 DEFAULT_WEIGHTS = getattr(settings, "SCHOOL_PROFILE_ANALYSIS_WEIGHTS", {
@@ -13,9 +22,72 @@ DEFAULT_WEIGHTS = getattr(settings, "SCHOOL_PROFILE_ANALYSIS_WEIGHTS", {
     "academic_info": 0.20,
 })
 
+PROFILE_CHUNK_SIZE = 64 * 1024
+PROFILE_FETCH_TIMEOUT = (3, 10)  # connect, read
 
-# Fees analysis helper
-def get_fees_analysis(data):
+# Weights used by the overall_score formula, keyed by the entries of analysis["scores"]
+OVERALL_SCORE_WEIGHTS = {
+    "profile_completeness_score": 0.20,
+    "data_quality_score": 0.20,
+    "visual_content_score": 0.15,
+    "infrastructure_score": 0.15,
+    "academic_information_score": 0.20,
+    "fee_completeness_score": 0.10,
+}
+
+# Maximum points taken off data_quality_score for each field copied from another profile
+DUPLICATE_CONTENT_PENALTIES = {
+    "about": 8,
+    "usp": 6,
+    "awards": 6,
+}
+
+DUPLICATE_FIELD_LABELS = {
+    "about": "'About Us'",
+    "usp": "Unique Selling Points (USP)",
+    "awards": "awards and achievements",
+}
+
+
+# Bump when the scoring rules change; stored features can then be re-scored with `manage.py rescore_scans`
+RULES_VERSION = 2
+# Bump when extract_profile_features() starts recording new inputs
+FEATURES_VERSION = 1
+
+BASIC_INFO_FIELDS = ["name", "slug", "logo", "email", "phone_no", "website", "short_name"]
+ACADEMIC_INFO_FIELDS = ["boards", "classes_offered", "medium", "languages_taught", "academic_session", "student_teacher_ratio"]
+ADDRESS_FIELDS = ["adress_1", "area", "district", "state", "pincode", "latitude", "longitude"]
+SPECIAL_FEATURE_FIELDS = ["verified_by_school", "year_of_establishment", "built_in_area", "number_of_students", "brochure"]
+
+# Field -> (weight, length that earns the full weight); list fields earn it by being non-empty
+CONTENT_FIELDS = {
+    "about": (10, 1000),
+    "usp": (10, 600),
+    "awards": (10, 600),
+    "pre_post_admission_process": (4, 200),
+    "withdrawl_policy": (4, 100),
+    "scholarship": (2, 100),
+    "life_at_school": (4, 100),
+    "infra_and_facilities": (4, 100),
+    "leader_messages": (1, 1),
+    "events": (1, 1),
+    "news": (1, 1),
+}
+TEXT_FIELDS = [
+    "about", "usp", "awards", "pre_post_admission_process", "withdrawl_policy",
+    "scholarship", "life_at_school", "infra_and_facilities",
+]
+
+# Raw profile values kept in the features (only when upstream sent the key) for display and rules
+PROFILE_FEATURE_FIELDS = [
+    "name", "format", "boards", "classes_offered", "student_teacher_ratio", "verified_by_school",
+    "year_of_establishment", "built_in_area", "number_of_students", "views",
+]
+ADDRESS_FEATURE_FIELDS = ["area", "district", "latitude", "longitude"]
+
+
+# Fees analysis helpers
+def get_fee_coverage(data):
     fees_structure = data.get("fees_structure", {})
     selected_session = data.get("internal", {}).get("selected_session")
     class_list = [c.get("name") for c in data.get("classes", []) if c.get("name")]
@@ -31,31 +103,107 @@ def get_fees_analysis(data):
         if (monthly_fee and monthly_fee != 0) or (annual_fee and annual_fee != 0):
             classes_with_fees.add(item.get("class"))
 
-    missing_classes = [cls for cls in class_list if cls not in classes_with_fees]
-    all_classes_have_fees = len(missing_classes) == 0
+    return {
+        "classes": len(class_list),
+        "missing_classes": [cls for cls in class_list if cls not in classes_with_fees],
+        # Whether any valid fees are available for the selected session
+        "latest_session_fees_available": len(classes_with_fees) > 0,
+    }
+
 
-    # Determine if any valid fees are available for selected session
-    latest_session_fees_available = len(classes_with_fees) > 0
+def score_fee_coverage(coverage):
+    missing_classes = coverage["missing_classes"]
 
-    # Score calculation
     score = 0
-    if latest_session_fees_available:
+    if coverage["latest_session_fees_available"]:
         score += 50
-        score += round(((len(class_list) - len(missing_classes)) / len(class_list)) * 50, 1)
+        score += round(((coverage["classes"] - len(missing_classes)) / coverage["classes"]) * 50, 1)
 
     return {
-        "latest_session_fees_available": latest_session_fees_available,
+        "latest_session_fees_available": coverage["latest_session_fees_available"],
         "missing_classes_in_selected_session": missing_classes,
         "fee_completeness_score": score
     }
 
 
+def get_fees_analysis(data):
+    return score_fee_coverage(get_fee_coverage(data))
+
+
+def extract_profile_features(data):
+    """
+    The compact inputs the scoring rules read from a school document: counts,
+    text lengths, presence flags, fee coverage and a few raw scalars. Stored with
+    every scan so it can be re-scored under new rules without refetching.
+    """
+    infrastructure = data.get("infrastruture", [])
+    gallery = data.get("gallery", {})
+    fees_structure = data.get("fees_structure", {})
+    address = data.get("address", {})
+
+    content_lengths = {}
+    content_items = {}
+    for field in CONTENT_FIELDS:
+        value = data.get(field)
+        if isinstance(value, list):
+            content_items[field] = len(value)
+        else:
+            content_lengths[field] = len(str(value).strip()) if value else 0
+
+    return {
+        "features_version": FEATURES_VERSION,
+        "profile": {field: data[field] for field in PROFILE_FEATURE_FIELDS if field in data},
+        "address": {field: address[field] for field in ADDRESS_FEATURE_FIELDS if field in address},
+        "basic_fields_filled": sum(1 for field in BASIC_INFO_FIELDS if data.get(field) and str(data.get(field)).strip()),
+        "has_website": bool(data.get("website")),
+        "has_email": bool(data.get("email")),
+        "academic_fields_filled": sum(1 for field in ACADEMIC_INFO_FIELDS if data.get(field)),
+        "address_fields_filled": sum(1 for field in ADDRESS_FIELDS if address.get(field)),
+        "special_fields_filled": sum(1 for field in SPECIAL_FEATURE_FIELDS if data.get(field)),
+        "has_brochure": bool(data.get("brochure")),
+        "infrastructure_categories": len(infrastructure),
+        "infrastructure_images": sum(len(infra["images"]) for infra in infrastructure if infra.get("images")),
+        "facility_features": sum(len(cat.get("features", [])) for cat in data.get("feature_facilities", [])),
+        "gallery_images": len(gallery.get("images", [])),
+        "gallery_videos": len(gallery.get("videos", [])),
+        "display_images": len(gallery.get("display_images", [])),
+        "has_virtual_tour": bool(gallery.get("virtual_tour")),
+        "fee_sessions": len(fees_structure.keys()) if fees_structure else 0,
+        "fee_coverage": get_fee_coverage(data),
+        # Stripped length of text fields (scored) and item counts of list fields
+        "content_lengths": content_lengths,
+        "content_items": content_items,
+        # Unstripped length of text fields, as reported in the analysis
+        "text_lengths": {field: len(str(data.get(field, ""))) if data.get(field) else 0 for field in TEXT_FIELDS},
+        "leader_messages": len(data.get("leader_messages") or []),
+        "events": len(data.get("events") or []),
+        "news": len(data.get("news") or []),
+    }
+
+
+def score_profile_features(features):
+    """
+    Score a school from its extracted features under the current RULES_VERSION.
+    When the features also carry the duplicate-content matches and media check
+    results found at scan time, those adjustments are applied as well.
+    """
+    analysis = score_base_features(features)
+    if "duplicates" in features:
+        analysis = apply_duplicate_content_penalty(analysis, features["duplicates"])
+    if features.get("media"):
+        analysis = apply_media_quality(analysis, features["media"])
+    return analysis
+
+
 def analyse_school_profile(data):
     """
     Super powerful school profile analyzer that evaluates all aspects of school data
     and provides comprehensive analysis with strength points and improvement suggestions.
     """
-    
+    return score_base_features(extract_profile_features(data))
+
+
+def score_base_features(features):
     analysis = {
         "overall_score": 0,
         "detailed_analysis": {},
@@ -64,155 +212,68 @@ def analyse_school_profile(data):
         "recommendations": [],
         "data_insights": {}
     }
-    
-    # Initialize counters and flags
-    total_fields = 0
-    filled_fields = 0
-    
+
+    profile = features["profile"]
+    address = features["address"]
+    text_lengths = features["text_lengths"]
+
     # 1. BASIC PROFILE INFORMATION ANALYSIS
-    basic_info = {
-        "name": data.get("name"),
-        "slug": data.get("slug"), 
-        "logo": data.get("logo"),
-        "email": data.get("email"),
-        "phone_no": data.get("phone_no"),
-        "website": data.get("website"),
-        "short_name": data.get("short_name")
-    }
-    
-    basic_filled = sum(1 for v in basic_info.values() if v and str(v).strip())
-    basic_score = (basic_filled / len(basic_info)) * 100
-    
+    basic_score = (features["basic_fields_filled"] / len(BASIC_INFO_FIELDS)) * 100
+
     # 2. ACADEMIC INFORMATION ANALYSIS
-    academic_info = {
-        "boards": data.get("boards", []),
-        "classes_offered": data.get("classes_offered"),
-        "medium": data.get("medium"),
-        "languages_taught": data.get("languages_taught", []),
-        "academic_session": data.get("academic_session"),
-        "student_teacher_ratio": data.get("student_teacher_ratio")
-    }
-    
-    academic_filled = 0
-    if academic_info["boards"]: academic_filled += 1
-    if academic_info["classes_offered"]: academic_filled += 1
-    if academic_info["medium"]: academic_filled += 1
-    if academic_info["languages_taught"]: academic_filled += 1
-    if academic_info["academic_session"]: academic_filled += 1
-    if academic_info["student_teacher_ratio"]: academic_filled += 1
-    
-    academic_score = (academic_filled / 6) * 100
-    
+    academic_score = (features["academic_fields_filled"] / len(ACADEMIC_INFO_FIELDS)) * 100
+
     # 3. INFRASTRUCTURE AND FACILITIES ANALYSIS
-    infrastructure = data.get("infrastruture", [])
-    feature_facilities = data.get("feature_facilities", [])
-    
     infra_score = 0
-    total_infra_images = 0
-    
-    for infra in infrastructure:
-        if infra.get("images"):
-            total_infra_images += len(infra["images"])
-            
-    infra_categories = len(infrastructure)
-    facility_features = sum(len(cat.get("features", [])) for cat in feature_facilities)
-    
+    total_infra_images = features["infrastructure_images"]
+    infra_categories = features["infrastructure_categories"]
+    facility_features = features["facility_features"]
+
     if infra_categories > 0:
         infra_score = min(100, (infra_categories * 15) + min(50, total_infra_images * 2))
-    
+
     # 4. VISUAL CONTENT ANALYSIS
-    gallery = data.get("gallery", {})
-    images = gallery.get("images", [])
-    videos = gallery.get("videos", [])
-    display_images = gallery.get("display_images", [])
-    
+    images = features["gallery_images"]
+    videos = features["gallery_videos"]
+    display_images = features["display_images"]
+
     visual_score = 0
     if images:
-        visual_score += min(40, len(images) * 2)  # Max 40 points for images
+        visual_score += min(40, images * 2)  # Max 40 points for images
     if videos:
-        visual_score += min(30, len(videos) * 6)  # Max 30 points for videos
+        visual_score += min(30, videos * 6)  # Max 30 points for videos
     if display_images:
-        visual_score += min(20, len(display_images) * 3)  # Max 20 points for display images
-    if gallery.get("virtual_tour"):
+        visual_score += min(20, display_images * 3)  # Max 20 points for display images
+    if features["has_virtual_tour"]:
         visual_score += 10  # Bonus for virtual tour
-        
+
     visual_score = min(100, visual_score)
-    
-    # 5. FEES AND ADMISSION ANALYSIS
-    fees_structure = data.get("fees_structure", {})
-    admissions = data.get("admissions", {})
-    
-    fees_score = 0
-    if fees_structure:
-        available_sessions = len(fees_structure.keys())
-        fees_score = min(100, available_sessions * 25)  # 25 points per session
-        
-    admission_score = 0
-    if admissions.get("documents"):
-        admission_score += 30
-    if admissions.get("school_timings"):
-        admission_score += 20
-    if admissions.get("openSession"):
-        admission_score += 30
-    if data.get("pre_post_admission_process"):
-        admission_score += 20
-        
-    # 6. CONTENT QUALITY ANALYSIS
-    def normalized_text_score(text, max_score, max_len):
-        if not text:
-            return 0
-        length = len(str(text).strip())
+
+    # 5. CONTENT QUALITY ANALYSIS
+    def normalized_text_score(length, max_score, max_len):
         if length >= max_len:
             return max_score
         return round((length / max_len) * max_score, 2)
 
-    content_fields = {
-        "about": (data.get("about"), 10, 1000),
-        "usp": (data.get("usp"), 10, 600),
-        "awards": (data.get("awards"), 10, 600),
-        "pre_post_admission_process": (data.get("pre_post_admission_process"), 4, 200),
-        "withdrawl_policy": (data.get("withdrawl_policy"), 4, 100),
-        "scholarship": (data.get("scholarship"), 2, 100),
-        "life_at_school": (data.get("life_at_school"), 4, 100),
-        "infra_and_facilities": (data.get("infra_and_facilities"), 4, 100),
-        "leader_messages": (data.get("leader_messages"), 1, 1),
-        "events": (data.get("events"), 1, 1),
-        "news": (data.get("news"), 1, 1),
-    }
-
     content_score = 0
     total_possible_score = 0
 
-    for field, (value, weight, max_len) in content_fields.items():
-        if isinstance(value, list):
-            value_score = weight if len(value) > 0 else 0
+    for field, (weight, max_len) in CONTENT_FIELDS.items():
+        if field in features["content_items"]:
+            value_score = weight if features["content_items"][field] > 0 else 0
         else:
-            value_score = normalized_text_score(value, weight, max_len)
+            value_score = normalized_text_score(features["content_lengths"].get(field, 0), weight, max_len)
         content_score += value_score
         total_possible_score += weight
 
     content_score = round((content_score / total_possible_score) * 100, 1)
-                
-    # 7. ADDRESS AND CONTACT ANALYSIS
-    address = data.get("address", {})
-    contact_score = 0
-    
-    address_fields = ["adress_1", "area", "district", "state", "pincode", "latitude", "longitude"]
-    filled_address = sum(1 for field in address_fields if address.get(field))
-    contact_score = (filled_address / len(address_fields)) * 100
-    
-    # 8. SPECIAL FEATURES ANALYSIS
-    special_features = {
-        "verified_by_school": data.get("verified_by_school", False),
-        "year_of_establishment": data.get("year_of_establishment"),
-        "built_in_area": data.get("built_in_area"),
-        "number_of_students": data.get("number_of_students"),
-        "brochure": data.get("brochure")
-    }
-    
-    filled = sum(1 for v in special_features.values() if v)
-    special_score = (filled / len(special_features)) * 100  # Cap at 100    
-    
+
+    # 6. ADDRESS AND CONTACT ANALYSIS
+    contact_score = (features["address_fields_filled"] / len(ADDRESS_FIELDS)) * 100
+
+    # 7. SPECIAL FEATURES ANALYSIS
+    special_score = (features["special_fields_filled"] / len(SPECIAL_FEATURE_FIELDS)) * 100
+
     # CALCULATE OVERALL SCORES
     profile_completeness_score = round((basic_score + academic_score + contact_score) / 3, 1)
     data_quality_score = round((content_score + special_score) / 2, 1)
@@ -220,179 +281,177 @@ def analyse_school_profile(data):
     infrastructure_score = round(infra_score, 1)
     contact_accessibility_score = round(contact_score, 1)
     academic_information_score = round(academic_score, 1)
-    
+
     # Normalize scores to a maximum of 100 before applying weights
     def normalize(score):
         return min(score, 100)
 
+    fees_analysis = score_fee_coverage(features["fee_coverage"])
+
+    weights = OVERALL_SCORE_WEIGHTS
     analysis["overall_score"] = round((
-        normalize(profile_completeness_score) * 0.20 +
-        normalize(data_quality_score) * 0.20 +
-        normalize(visual_content_score) * 0.15 +
-        normalize(infrastructure_score) * 0.15 +
-        normalize(academic_information_score) * 0.20 +
-        normalize(analysis["detailed_analysis"].get("data_completeness", {}).get("fee_completeness_score", 0)) * 0.10
+        normalize(profile_completeness_score) * weights["profile_completeness_score"] +
+        normalize(data_quality_score) * weights["data_quality_score"] +
+        normalize(visual_content_score) * weights["visual_content_score"] +
+        normalize(infrastructure_score) * weights["infrastructure_score"] +
+        normalize(academic_information_score) * weights["academic_information_score"] +
+        normalize(fees_analysis["fee_completeness_score"]) * weights["fee_completeness_score"]
     ), 1)
-    
+
     # DETAILED INSIGHTS
+    fee_sessions = features["fee_sessions"]
     analysis["data_insights"] = {
-        "total_images": len(images),
-        "total_videos": len(videos),
+        "total_images": images,
+        "total_videos": videos,
         "infrastructure_categories": infra_categories,
         "total_infrastructure_images": total_infra_images,
         "facility_features_count": facility_features,
-        "available_fee_sessions": len(fees_structure.keys()) if fees_structure else 0,
-        "boards_offered": len(data.get("boards", [])),
-        "classes_range": data.get("classes_offered", "Not specified"),
-        "campus_size": data.get("built_in_area", "Not specified"),
-        "student_count": data.get("number_of_students", "Not specified"),
-        "establishment_year": data.get("year_of_establishment", "Not specified"),
-        "view_count": data.get("views", 0)
+        "available_fee_sessions": fee_sessions,
+        "boards_offered": len(profile.get("boards", [])),
+        "classes_range": profile.get("classes_offered", "Not specified"),
+        "campus_size": profile.get("built_in_area", "Not specified"),
+        "student_count": profile.get("number_of_students", "Not specified"),
+        "establishment_year": profile.get("year_of_establishment", "Not specified"),
+        "view_count": profile.get("views", 0)
     }
-    
+
     # GENERATE STRENGTH POINTS
     strength_points = []
-    
-    if len(images) >= 15:
-        strength_points.append(f"Excellent visual representation with {len(images)} high-quality gallery images")
-    
-    if len(videos) >= 3:
-        strength_points.append(f"Strong multimedia content with {len(videos)} promotional videos")
-        
+
+    if images >= 15:
+        strength_points.append(f"Excellent visual representation with {images} high-quality gallery images")
+
+    if videos >= 3:
+        strength_points.append(f"Strong multimedia content with {videos} promotional videos")
+
     if infra_categories >= 6:
         strength_points.append(f"Comprehensive infrastructure documentation across {infra_categories} categories")
-        
+
     if total_infra_images >= 20:
         strength_points.append(f"Detailed infrastructure showcase with {total_infra_images} facility images")
-        
-    if len(data.get("boards", [])) >= 2:
-        strength_points.append(f"Multiple board options available: {', '.join(data.get('boards', []))}")
-        
-    if data.get("verified_by_school"):
+
+    if len(profile.get("boards", [])) >= 2:
+        strength_points.append(f"Multiple board options available: {', '.join(profile.get('boards', []))}")
+
+    if profile.get("verified_by_school"):
         strength_points.append("School-verified profile ensuring authentic information")
-        
-    if data.get("year_of_establishment") and int(data.get("year_of_establishment", 0)) < 2010:
-        strength_points.append(f"Well-established institution since {data.get('year_of_establishment')}")
-        
-    if data.get("built_in_area") and any(unit in str(data.get("built_in_area")).lower() for unit in ["acre", "sq ft"]):
-        strength_points.append(f"Spacious campus with {data.get('built_in_area')} of built area")
-        
-    if len(fees_structure.keys()) >= 3:
-        strength_points.append(f"Transparent fee structure available for {len(fees_structure.keys())} academic sessions")
-        
-    if data.get("awards") and len(str(data.get("awards"))) > 100:
+
+    if profile.get("year_of_establishment") and int(profile.get("year_of_establishment", 0)) < 2010:
+        strength_points.append(f"Well-established institution since {profile.get('year_of_establishment')}")
+
+    if profile.get("built_in_area") and any(unit in str(profile.get("built_in_area")).lower() for unit in ["acre", "sq ft"]):
+        strength_points.append(f"Spacious campus with {profile.get('built_in_area')} of built area")
+
+    if fee_sessions >= 3:
+        strength_points.append(f"Transparent fee structure available for {fee_sessions} academic sessions")
+
+    if text_lengths["awards"] > 100:
         strength_points.append("Strong recognition with documented awards and achievements")
-        
+
     if facility_features >= 15:
         strength_points.append(f"Well-equipped with {facility_features} documented facilities and features")
-        
-    if data.get("student_teacher_ratio"):
-        ratio_parts = str(data.get("student_teacher_ratio")).split(":")
+
+    if profile.get("student_teacher_ratio"):
+        ratio_parts = str(profile.get("student_teacher_ratio")).split(":")
         if len(ratio_parts) == 2 and int(ratio_parts[0]) <= 15:
-            strength_points.append(f"Excellent student-teacher ratio of {data.get('student_teacher_ratio')}")
-    
+            strength_points.append(f"Excellent student-teacher ratio of {profile.get('student_teacher_ratio')}")
+
     # GENERATE IMPROVEMENT SUGGESTIONS
     improvement_suggestions = []
-    
-    if len(images) < 10:
+
+    if images < 10:
         improvement_suggestions.append("Add more high-quality photos of campus facilities and student activities")
-        
-    if len(videos) < 2:
+
+    if videos < 2:
         improvement_suggestions.append("Include school videos and virtual campus tours to enhance engagement")
-        
-    if not data.get("about") or len(str(data.get("about"))) < 200:
+
+    if text_lengths["about"] < 200:
         improvement_suggestions.append("Expand the 'About Us' section with detailed school philosophy and vision")
-        
-    if not data.get("usp") or len(str(data.get("usp"))) < 100:
+
+    if text_lengths["usp"] < 100:
         improvement_suggestions.append("Add comprehensive Unique Selling Points (USP) to highlight school advantages")
-        
+
     if infra_categories < 5:
         improvement_suggestions.append("Document more infrastructure categories with detailed descriptions")
-        
+
     if total_infra_images < 15:
         improvement_suggestions.append("Include more infrastructure images to showcase facilities better")
-        
-    if not data.get("awards") or len(str(data.get("awards"))) < 50:
+
+    if text_lengths["awards"] < 50:
         improvement_suggestions.append("Add school awards, recognitions, and achievements section")
-        
-    if len(fees_structure.keys()) < 2:
+
+    if fee_sessions < 2:
         improvement_suggestions.append("Provide fee structure for multiple academic sessions")
-        
-    if not data.get("brochure"):
+
+    if not features["has_brochure"]:
         improvement_suggestions.append("Upload school brochure for comprehensive information access")
-        
-    if not data.get("website") or not data.get("email"):
+
+    if not features["has_website"] or not features["has_email"]:
         improvement_suggestions.append("Update contact information including website and email details")
-        
+
     if not address.get("latitude") or not address.get("longitude"):
         improvement_suggestions.append("Add precise location coordinates for better accessibility")
-        
-    if not data.get("pre_post_admission_process"):
+
+    if not text_lengths["pre_post_admission_process"]:
         improvement_suggestions.append("Include detailed admission process and requirements")
-        
+
     if facility_features < 10:
         improvement_suggestions.append("Document more facilities and features to showcase school amenities")
-        
-    if not gallery.get("virtual_tour"):
+
+    if not features["has_virtual_tour"]:
         improvement_suggestions.append("Add virtual tour link for immersive campus experience")
-        
-    if data.get("views", 0) < 5000:
+
+    if profile.get("views", 0) < 5000:
         improvement_suggestions.append("Optimize profile content and SEO to increase visibility and views")
-    
+
     # GENERATE RECOMMENDATIONS
     recommendations = []
-    
+
     if analysis["overall_score"] >= 80:
         recommendations.append("Excellent profile! Focus on regular content updates and engagement")
     elif analysis["overall_score"] >= 60:
         recommendations.append("Good profile foundation. Enhance visual content and facility documentation")
     else:
         recommendations.append("Profile needs significant improvement in content quality and completeness")
-        
+
     if visual_score < 50:
         recommendations.append("Prioritize adding high-quality images and videos for better engagement")
-        
+
     if academic_score < 70:
         recommendations.append("Complete academic information including all curriculum details")
-        
+
     if infra_score < 60:
         recommendations.append("Enhance infrastructure documentation with detailed descriptions and images")
-    
+
     # Assign calculated values
     analysis["strength_points"] = strength_points[:8]  # Limit to top 8 points
     analysis["improvement_suggestions"] = improvement_suggestions[:10]  # Limit to top 10 suggestions
     analysis["recommendations"] = recommendations
 
-    fees_analysis = get_fees_analysis(data)
-    
     # DETAILED ANALYSIS BREAKDOWN
     analysis["detailed_analysis"] = {
         "profile_summary": {
-            "school_name": data.get("name", "Not specified"),
+            "school_name": profile.get("name", "Not specified"),
             "location": f"{address.get('area', '')}, {address.get('district', '')}".strip(', '),
-            "establishment_year": data.get("year_of_establishment", "Not specified"),
-            "school_type": data.get("format", "Not specified"),
-            "boards": data.get("boards", []),
-            "classes": data.get("classes_offered", "Not specified"),
+            "district": address.get("district") or "Not specified",
+            "establishment_year": profile.get("year_of_establishment", "Not specified"),
+            "school_type": profile.get("format", "Not specified"),
+            "boards": profile.get("boards", []),
+            "classes": profile.get("classes_offered", "Not specified"),
+            "latitude": address.get("latitude"),
+            "longitude": address.get("longitude"),
         },
         "content_analysis": {
             "visual_assets": {
-                "gallery_images": len(images),
-                "promotional_videos": len(videos),
+                "gallery_images": images,
+                "promotional_videos": videos,
                 "infrastructure_images": total_infra_images,
             },
             "textual_content": {
-                "about_length": len(str(data.get("about", ""))) if data.get("about") else 0,
-                "usp_length": len(str(data.get("usp", ""))) if data.get("usp") else 0,
-                "awards_length": len(str(data.get("awards", ""))) if data.get("awards") else 0,
-                "pre_post_admission_process_length": len(str(data.get("pre_post_admission_process", ""))) if data.get("pre_post_admission_process") else 0,
-                "withdrawl_policy_length": len(str(data.get("withdrawl_policy", ""))) if data.get("withdrawl_policy") else 0,
-                "scholarship_length": len(str(data.get("scholarship", ""))) if data.get("scholarship") else 0,
-                "life_at_school_length": len(str(data.get("life_at_school", ""))) if data.get("life_at_school") else 0,
-                "infra_and_facilities_length": len(str(data.get("infra_and_facilities", ""))) if data.get("infra_and_facilities") else 0,
-                "leader_message_count": len(data.get("leader_messages", [])),
-                "event_count": len(data.get("events", [])),
-                "news_count": len(data.get("news", []))
+                **{f"{field}_length": text_lengths[field] for field in TEXT_FIELDS},
+                "leader_message_count": features["leader_messages"],
+                "event_count": features["events"],
+                "news_count": features["news"]
             },
             "facility_documentation": {
                 "infrastructure_categories": infra_categories,
@@ -407,7 +466,7 @@ def analyse_school_profile(data):
             "fee_completeness_score": fees_analysis.get("fee_completeness_score", 0)
         }
     }
-    
+
     # COLLECT ALL NORMALIZED SCORES FOR CONSISTENCY
     analysis["scores"] = {
         "profile_completeness_score": normalize(profile_completeness_score),
@@ -422,15 +481,26 @@ def analyse_school_profile(data):
     return analysis
 
 
+def get_latest_scans(slugs=None):
+    """Queryset of the most recent SchoolProfileScan for every slug (or only for `slugs`)."""
+    scans = SchoolProfileScan.objects.all() if slugs is None else SchoolProfileScan.objects.filter(slug__in=slugs)
+    latest_ids = scans.values("slug").annotate(latest_id=Max("id")).values("latest_id")
+    return SchoolProfileScan.objects.filter(id__in=latest_ids)
+
+
 def get_profile_scan_delta(slug):
     recent_scans = SchoolProfileScan.objects.filter(slug=slug).order_by("-created_at")[:2]
     if len(recent_scans) < 2:
         return None
-    current_score = recent_scans[0].score or 0
-    previous_score = recent_scans[1].score or 0
+    return score_delta(recent_scans[0].score, recent_scans[0].created_at, recent_scans[1].score, recent_scans[1].created_at)
+
+
+def score_delta(current_score, current_at, previous_score, previous_at):
+    current_score = current_score or 0
+    previous_score = previous_score or 0
     delta = current_score - previous_score
     percent_change = round((delta / previous_score) * 100, 1) if previous_score else None
-    delta_time = recent_scans[0].created_at - recent_scans[1].created_at
+    delta_time = current_at - previous_at
     return {
         "current_score": current_score,
         "previous_score": previous_score,
@@ -443,7 +513,7 @@ def get_profile_scan_delta(slug):
             if delta_time.total_seconds() < 3600 else
             f"{delta_time.total_seconds() // 3600:.0f} hours"
             if delta_time.total_seconds() < 86400 else
-            f"{(recent_scans[0].created_at - recent_scans[1].created_at).days} days"
+            f"{delta_time.days} days"
         )
     }
 
@@ -462,23 +532,178 @@ def enrich_analysis_with_extras(slug, analysis):
         analysis["trend"] = trend
 
     # Add confidence level
-    score = analysis.get("overall_score", 0)
+    analysis["confidence_level"] = get_confidence_level(analysis.get("overall_score", 0))
+
+    return analysis
+
+
+def get_confidence_level(score):
     if score >= 85:
-        confidence = "high"
-    elif score >= 65:
-        confidence = "medium"
-    else:
-        confidence = "low"
-    analysis["confidence_level"] = confidence
+        return "high"
+    if score >= 65:
+        return "medium"
+    return "low"
+
+
+def apply_duplicate_content_penalty(analysis, duplicates):
+    copied = {}
+    for duplicate in duplicates:
+        for field, similarity in duplicate["fields"].items():
+            copied.setdefault(field, []).append(similarity)
 
+    penalty = sum(DUPLICATE_CONTENT_PENALTIES.get(field, 0) * max(similarities) for field, similarities in copied.items())
+    data_quality = analysis["scores"]["data_quality_score"]
+    penalty = round(min(penalty, data_quality), 1)
+
+    if penalty:
+        analysis["scores"]["data_quality_score"] = round(data_quality - penalty, 1)
+        analysis["overall_score"] = round(
+            max(0, analysis["overall_score"] - penalty * OVERALL_SCORE_WEIGHTS["data_quality_score"]), 1
+        )
+
+    analysis["detailed_analysis"]["content_duplication"] = {
+        "duplicate_fields": {field: len(similarities) for field, similarities in copied.items()},
+        "data_quality_penalty": penalty,
+        "nearest_duplicates": duplicates[:5],
+    }
+
+    suggestions = [
+        f"Rewrite the {DUPLICATE_FIELD_LABELS.get(field, field)} section in your own words, it closely matches {len(similarities)} other school profile(s)"
+        for field, similarities in copied.items()
+    ]
+    analysis["improvement_suggestions"] = (suggestions + analysis["improvement_suggestions"])[:10]
+
+    return analysis
+
+
+def apply_media_quality(analysis, media):
+    """Only count gallery and infrastructure images that load, are big enough and are not repeats."""
+    scores = analysis["scores"]
+    suggestions = []
+
+    gallery = media.get("gallery")
+    if gallery:
+        counted = min(40, gallery["total_images"] * 2)
+        usable = min(40, gallery["estimated_usable_images"] * 2)
+        visual = scores["visual_content_score"]
+        scores["visual_content_score"] = round(max(0, visual - counted + usable), 1)
+        analysis["overall_score"] += (scores["visual_content_score"] - visual) * OVERALL_SCORE_WEIGHTS["visual_content_score"]
+
+    infrastructure = media.get("infrastructure")
+    if infrastructure:
+        categories = analysis["data_insights"]["infrastructure_categories"]
+        infra = scores["infrastructure_score"]
+        scores["infrastructure_score"] = round(min(100, categories * 15 + min(50, infrastructure["estimated_usable_images"] * 2)), 1)
+        analysis["overall_score"] += (scores["infrastructure_score"] - infra) * OVERALL_SCORE_WEIGHTS["infrastructure_score"]
+
+    analysis["overall_score"] = round(max(0, analysis["overall_score"]), 1)
+
+    for label, summary in (("gallery", gallery), ("infrastructure", infrastructure)):
+        if not summary:
+            continue
+        if summary["broken_images"]:
+            suggestions.append(f"Fix {summary['broken_images']} broken {label} image links")
+        if summary["low_resolution_images"]:
+            suggestions.append(f"Replace {summary['low_resolution_images']} low-resolution {label} photos (below {MIN_IMAGE_WIDTH}x{MIN_IMAGE_HEIGHT}) with sharper images")
+        if summary["duplicate_images"]:
+            suggestions.append(f"Remove {summary['duplicate_images']} duplicate {label} photos")
+
+    analysis["detailed_analysis"]["media_quality"] = media
+    analysis["improvement_suggestions"] = (suggestions + analysis["improvement_suggestions"])[:10]
     return analysis
 
 
-def run_complete_school_analysis(slug, data):
-    # Step 1: Run the main profile analysis
-    base_analysis = analyse_school_profile(data)
+def build_profile_features(slug, data, content_signatures=None, check_media=False):
+    """
+    Everything scoring needs from a fetched profile: the extracted features plus
+    the near-duplicate matches and media check results. Media is only fetched
+    with `check_media` (background scans); otherwise the school's last stored
+    media summary is reused so interactive scans stay fast and comparable.
+    """
+    features = extract_profile_features(data)
+
+    # Text copied from other school profiles
+    if content_signatures is None:
+        content_signatures = compute_content_signatures(data)
+    features["duplicates"] = find_near_duplicates(content_signatures, exclude_slug=slug)
+
+    # Media that actually loads and is worth showing
+    if MEDIA_CHECK_ENABLED:
+        media = check_profile_media(data) if check_media else get_stored_media_summary(slug)
+        if media:
+            features["media"] = media
+
+    return features
+
+
+def get_stored_media_summary(slug):
+    return (
+        SchoolProfileScan.objects.filter(slug=slug, features__media__isnull=False)
+        .order_by("-id").values_list("features__media", flat=True).first()
+    )
+
+
+def run_complete_school_analysis(slug, data, content_signatures=None, features=None):
+    # Step 1: Score the profile, including duplicate content and media quality
+    if features is None:
+        features = build_profile_features(slug, data, content_signatures=content_signatures)
+    base_analysis = score_profile_features(features)
 
     # Step 2: Enrich the analysis with smart add-ons
     enriched_analysis = enrich_analysis_with_extras(slug, base_analysis)
 
-    return enriched_analysis
\ No newline at end of file
+    # Step 3: Benchmark against the nearest schools
+    neighbourhood = benchmark_against_neighbours(slug, enriched_analysis)
+    if neighbourhood:
+        enriched_analysis["neighbourhood"] = neighbourhood
+
+    return enriched_analysis
+
+
+def fetch_school_profile(slug):
+    url = settings.SCHOOL_PROFILE_API_URL.format(slug=slug)
+    with requests.get(url, stream=True, timeout=PROFILE_FETCH_TIMEOUT) as res:
+        if res.status_code != 200:
+            return None
+
+        # Only the fields the scoring rules read are kept; media and news arrays are just counted
+        data, stats = load_school_profile(res.iter_content(chunk_size=PROFILE_CHUNK_SIZE))
+
+    metrics.incr("upstream.bytes_parsed", stats["bytes_parsed"])
+    metrics.incr("upstream.bytes_retained", stats["bytes_retained"])
+    return data
+
+
+def scan_school_profile(slug, data=None, check_media=False):
+    """
+    Fetch (unless `data` is given), analyse and store a new scan. Returns None if
+    the school is not found. Pass `check_media` from background jobs only.
+    """
+    if data is None:
+        data = fetch_school_profile(slug)
+        if data is None:
+            return None
+
+    content_signatures = compute_content_signatures(data)
+    features = build_profile_features(slug, data, content_signatures=content_signatures, check_media=check_media)
+    analysis = run_complete_school_analysis(slug, data, features=features)
+
+    started = time.monotonic()
+    try:
+        scan = SchoolProfileScan.objects.create(
+            slug=slug,
+            score=analysis.get("overall_score", 0),
+            analysis=analysis,
+            features=features,
+            rules_version=RULES_VERSION,
+        )
+        store_content_signatures(scan, content_signatures)
+    except OperationalError as e:
+        if "locked" in str(e):
+            metrics.incr("scan.write_locked")
+        raise
+    metrics.incr("scan.write")
+    metrics.incr("scan.write_ms", round((time.monotonic() - started) * 1000))
+    index_scan_location(scan)
+
+    return scan
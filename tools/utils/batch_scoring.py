@@ -0,0 +1,183 @@
+import csv
+import json
+import queue
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from tools.utils.analyser import analyse_school_profile
+from tools.utils.simulation import SIMULATION_DIMENSIONS
+
+
+SCORE_COLUMNS = ["line", "slug", "name", "overall_score"] + SIMULATION_DIMENSIONS + ["error"]
+
+
+def _init_worker():
+    # Workers started with "spawn" (macOS, Windows) need Django set up again
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def score_line(number, line, full=False):
+    row = dict.fromkeys(SCORE_COLUMNS)
+    row["line"] = number
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("line is not a JSON object")
+        analysis = analyse_school_profile(data)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"[:500]
+        return row
+
+    row["slug"] = data.get("slug")
+    row["name"] = data.get("name")
+    row["overall_score"] = analysis["overall_score"]
+    for dim in SIMULATION_DIMENSIONS:
+        row[dim] = analysis["scores"].get(dim)
+    if full:
+        row["analysis"] = analysis
+    return row
+
+
+def score_chunk(chunk, full=False):
+    """Score a list of (line number, raw JSON line); runs in a pool worker."""
+    return [score_line(number, line, full=full) for number, line in chunk]
+
+
+def read_chunks(lines, chunk_size, limit=None):
+    chunk = []
+    for number, line in enumerate(lines, start=1):
+        if limit is not None and number > limit:
+            break
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_stream(lines, workers=None, chunk_size=64, ordered=True, in_flight_per_worker=4, full=False, limit=None):
+    """
+    Score JSON lines on a process pool, yielding result rows. At most
+    `in_flight_per_worker` chunks per worker are read ahead, so memory stays
+    bounded however long the input is (Pool.imap would read it all up front).
+    With `ordered`, rows come out in input order; otherwise as soon as they are ready.
+    """
+    with Pool(processes=workers, initializer=_init_worker) as pool:
+        window = pool._processes * in_flight_per_worker
+        chunks = read_chunks(lines, chunk_size, limit=limit)
+
+        if ordered:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(score_chunk, (chunk, full)))
+                if len(pending) >= window:
+                    yield from pending.popleft().get()
+            while pending:
+                yield from pending.popleft().get()
+            return
+
+        done = queue.Queue()
+        in_flight = 0
+        for chunk in chunks:
+            pool.apply_async(score_chunk, (chunk, full), callback=done.put, error_callback=done.put)
+            in_flight += 1
+            while in_flight >= window or (in_flight and not done.empty()):
+                yield from _unwrap(done.get())
+                in_flight -= 1
+        while in_flight:
+            yield from _unwrap(done.get())
+            in_flight -= 1
+
+
+def _unwrap(result):
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+class JSONLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row):
+        self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class CSVWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=SCORE_COLUMNS, extrasaction="ignore")
+        self.writer.writeheader()
+        self.stream = stream
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.stream.flush()
+
+
+class ParquetWriter:
+    """Buffers `row_group_size` rows at a time and writes each as a Parquet row group (needs pyarrow)."""
+
+    def __init__(self, path, row_group_size=100000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [("line", pa.int64()), ("slug", pa.string()), ("name", pa.string())]
+            + [(column, pa.float64()) for column in ["overall_score"] + SIMULATION_DIMENSIONS]
+            + [("error", pa.string())]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            columns = {name: [row.get(name) for row in self.rows] for name in self.schema.names}
+            self.writer.write_table(self.pa.table(columns, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class Progress:
+    def __init__(self, report, every_seconds=5):
+        self.report = report
+        self.every_seconds = every_seconds
+        self.started = self.last_report = time.monotonic()
+        self.lines = 0
+        self.errors = 0
+
+    def update(self, row):
+        self.lines += 1
+        if row["error"]:
+            self.errors += 1
+        current = time.monotonic()
+        if current - self.last_report >= self.every_seconds:
+            self.last_report = current
+            self.report(self.summary())
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.lines / elapsed if elapsed else 0
+        return f"{self.lines} lines in {elapsed:.1f}s ({rate:,.0f} lines/s), {self.errors} errors"
@@ -0,0 +1,145 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+from tools.utils import metrics
+from tools.utils.analyser import get_latest_scans, scan_school_profile
+from tools.utils.notifications import SLUG_RE
+from tools.utils.simulation import SIMULATION_DIMENSIONS, rank_scores
+
+
+COMPARISON_MAX_SLUGS = getattr(settings, "COMPARISON_MAX_SLUGS", 10)
+COMPARISON_MAX_AGE_HOURS = getattr(settings, "COMPARISON_MAX_AGE_HOURS", 24)
+COMPARISON_FETCH_WORKERS = getattr(settings, "COMPARISON_FETCH_WORKERS", 5)
+# Larger max_age_hours values are treated as this; stored scans are never older in practice
+COMPARISON_MAX_AGE_LIMIT_HOURS = 24 * 365 * 10
+
+COMPARISON_DIMENSIONS = ["overall_score"] + SIMULATION_DIMENSIONS
+
+# Only these small keys of the stored analysis are read back, never the whole blob
+COMPARISON_FIELDS = {
+    "id": "id",
+    "slug": "slug",
+    "created_at": "created_at",
+    "school_name": "analysis__detailed_analysis__profile_summary__school_name",
+    "overall_score": "analysis__overall_score",
+    "scores": "analysis__scores",
+}
+
+
+def _scan_row(scan):
+    profile_summary = scan.analysis.get("detailed_analysis", {}).get("profile_summary", {})
+    return {
+        "id": scan.id,
+        "slug": scan.slug,
+        "created_at": scan.created_at,
+        "school_name": profile_summary.get("school_name"),
+        "overall_score": scan.analysis.get("overall_score"),
+        "scores": scan.analysis.get("scores"),
+    }
+
+
+def _rescan(slug):
+    try:
+        scan = scan_school_profile(slug)
+        return (_scan_row(scan) if scan is not None else None), None
+    except Exception as e:
+        return None, str(e)[:200]
+    finally:
+        # Worker threads get their own DB connections; don't leave them open
+        connections.close_all()
+
+
+def load_comparison_scans(slugs, max_age, refresh=False):
+    """
+    Latest scan per slug, rescanning (concurrently) only the slugs whose stored
+    scan is missing or older than `max_age`. Returns ({slug: (row, source)}, errors).
+    """
+    cutoff = now() - max_age
+    rows = get_latest_scans(slugs).values_list(*COMPARISON_FIELDS.values())
+    stored = {row["slug"]: row for row in (dict(zip(COMPARISON_FIELDS, values)) for values in rows)}
+
+    scans = {}
+    stale = []
+    for slug in slugs:
+        row = stored.get(slug)
+        if row is not None and not refresh and row["created_at"] >= cutoff:
+            scans[slug] = (row, "stored")
+        else:
+            stale.append(slug)
+    metrics.incr("comparison.hit", len(scans))
+    metrics.incr("comparison.miss", len(stale))
+
+    errors = {}
+    if stale:
+        with ThreadPoolExecutor(max_workers=min(COMPARISON_FETCH_WORKERS, len(stale))) as pool:
+            for slug, (row, error) in zip(stale, pool.map(_rescan, stale)):
+                if row is not None:
+                    scans[slug] = (row, "fetched")
+                elif slug in stored:
+                    # Upstream is unavailable: an old answer beats none
+                    scans[slug] = (stored[slug], "stale")
+                    errors[slug] = error or "School not found upstream"
+                else:
+                    errors[slug] = error or "School not found"
+
+    return scans, errors
+
+
+def compare_schools(slugs, max_age_hours=COMPARISON_MAX_AGE_HOURS, refresh=False):
+    """
+    Align the sub-scores of the latest scans of `slugs` into a matrix (one row per
+    school, one column per dimension) and rank the schools on every dimension.
+    """
+    slugs = list(dict.fromkeys(slugs))
+    if not slugs:
+        raise ValueError("Provide at least one slug")
+    if len(slugs) > COMPARISON_MAX_SLUGS:
+        raise ValueError(f"At most {COMPARISON_MAX_SLUGS} schools can be compared at once")
+    invalid = [slug for slug in slugs if not SLUG_RE.match(slug)]
+    if invalid:
+        raise ValueError(f"Invalid slugs: {', '.join(invalid)}")
+    if not math.isfinite(max_age_hours) or max_age_hours < 0:
+        raise ValueError("max_age_hours must be a non-negative number")
+    max_age_hours = min(max_age_hours, COMPARISON_MAX_AGE_LIMIT_HOURS)
+
+    scans, errors = load_comparison_scans(slugs, timedelta(hours=max_age_hours), refresh=refresh)
+    compared = [slug for slug in slugs if slug in scans]
+
+    schools = []
+    rows = []
+    for slug in compared:
+        row, source = scans[slug]
+        scores = row["scores"] if isinstance(row["scores"], dict) else {}
+        schools.append({
+            "slug": slug,
+            "school_name": row["school_name"],
+            "scan_id": row["id"],
+            "scanned_at": row["created_at"],
+            "source": source,
+        })
+        rows.append([row["overall_score"] or 0] + [scores.get(dim) or 0 for dim in SIMULATION_DIMENSIONS])
+
+    matrix = np.asarray(rows, dtype=np.float64).reshape(len(compared), len(COMPARISON_DIMENSIONS))
+    ranks = {
+        dim: rank_scores(matrix[:, i]).tolist() if len(compared) else []
+        for i, dim in enumerate(COMPARISON_DIMENSIONS)
+    }
+    leaders = {
+        dim: [compared[j] for j, rank in enumerate(ranks[dim]) if rank == 1]
+        for dim in COMPARISON_DIMENSIONS
+    }
+
+    return {
+        "dimensions": COMPARISON_DIMENSIONS,
+        "schools": schools,
+        "matrix": [[round(float(value), 1) for value in row] for row in matrix],
+        "ranks": ranks,
+        "leaders": leaders,
+        "errors": errors,
+    }
@@ -0,0 +1,213 @@
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from tools.models import SchoolProfileScan
+
+
+GRID_CELL_DEGREES = getattr(settings, "SPATIAL_INDEX_CELL_DEGREES", 0.05)  # ~5.5 km at the equator
+REFRESH_INTERVAL_SECONDS = getattr(settings, "SPATIAL_INDEX_REFRESH_SECONDS", 10)
+NEIGHBOURHOOD_SIZE = getattr(settings, "SCHOOL_NEIGHBOURHOOD_SIZE", 10)
+MAX_SEARCH_RINGS = 200
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+COORDINATE_KEYS = (
+    "analysis__detailed_analysis__profile_summary__latitude",
+    "analysis__detailed_analysis__profile_summary__longitude",
+)
+
+
+def parse_coordinates(latitude, longitude):
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None
+    return latitude, longitude
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    Uniform lat/lon grid over the latest scan of every school.
+    The first refresh loads the latest scans; later refreshes only read scans
+    created since the last seen id, so keeping the index current is cheap.
+    """
+
+    def __init__(self, cell_degrees=GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = defaultdict(set)
+        self.points = {}  # slug -> (latitude, longitude, overall_score, scores, scan_id)
+        self.last_scan_id = 0
+        self.last_refresh = None
+        self._lock = threading.RLock()
+
+    def cell_for(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def upsert(self, slug, latitude, longitude, overall_score, scores, scan_id=0):
+        with self._lock:
+            previous = self.points.get(slug)
+            if previous:
+                if previous[4] > scan_id:
+                    return
+                self.cells[self.cell_for(previous[0], previous[1])].discard(slug)
+            self.points[slug] = (latitude, longitude, overall_score or 0, scores or {}, scan_id)
+            self.cells[self.cell_for(latitude, longitude)].add(slug)
+
+    def refresh(self, force=False):
+        if not force and self.last_refresh and time.monotonic() - self.last_refresh < REFRESH_INTERVAL_SECONDS:
+            return
+
+        from tools.utils.analyser import get_latest_scans
+
+        with self._lock:
+            if self.last_refresh:
+                scans = SchoolProfileScan.objects.filter(id__gt=self.last_scan_id)
+            else:
+                scans = get_latest_scans()
+            rows = scans.order_by("id").values_list(
+                "id", "slug", "analysis__overall_score", "analysis__scores", *COORDINATE_KEYS
+            )
+            for scan_id, slug, overall_score, scores, latitude, longitude in rows.iterator(chunk_size=2000):
+                coordinates = parse_coordinates(latitude, longitude)
+                if coordinates:
+                    self.upsert(slug, *coordinates, overall_score, scores, scan_id)
+                self.last_scan_id = max(self.last_scan_id, scan_id)
+            self.last_refresh = time.monotonic()
+
+    def _ring(self, center, radius):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for dc in range(-radius, radius + 1):
+            yield (row - radius, col + dc)
+            yield (row + radius, col + dc)
+        for dr in range(-radius + 1, radius):
+            yield (row + dr, col - radius)
+            yield (row + dr, col + radius)
+
+    def _min_cell_km(self, latitude):
+        return self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(min(abs(latitude) + self.cell_degrees, 89))), 0.01)
+
+    def nearest(self, latitude, longitude, count, exclude=None):
+        """The `count` closest schools, searched ring by ring outwards from the query cell."""
+        center = self.cell_for(latitude, longitude)
+        cell_km = self._min_cell_km(latitude)
+        found = []
+
+        with self._lock:
+            for radius in range(MAX_SEARCH_RINGS):
+                for cell in self._ring(center, radius):
+                    for slug in self.cells.get(cell, ()):
+                        if slug == exclude:
+                            continue
+                        point = self.points[slug]
+                        found.append((haversine_km(latitude, longitude, point[0], point[1]), slug, point))
+
+                # Anything outside the rings searched so far is at least radius * cell_km away
+                if len(found) >= count:
+                    found.sort(key=lambda item: item[0])
+                    if found[count - 1][0] <= radius * cell_km:
+                        break
+                if len(found) == len(self.points) - (1 if exclude in self.points else 0):
+                    break
+
+        found.sort(key=lambda item: item[0])
+        return found[:count]
+
+    def within_radius(self, latitude, longitude, radius_km, limit=None):
+        center = self.cell_for(latitude, longitude)
+        rings = min(MAX_SEARCH_RINGS, math.ceil(radius_km / self._min_cell_km(latitude)) + 1)
+        found = []
+
+        with self._lock:
+            for radius in range(rings + 1):
+                for cell in self._ring(center, radius):
+                    for slug in self.cells.get(cell, ()):
+                        point = self.points[slug]
+                        distance = haversine_km(latitude, longitude, point[0], point[1])
+                        if distance <= radius_km:
+                            found.append((distance, slug, point))
+
+        found.sort(key=lambda item: item[0])
+        return found[:limit] if limit else found
+
+
+spatial_index = SpatialIndex()
+
+
+def get_spatial_index():
+    spatial_index.refresh()
+    return spatial_index
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if not values:
+        return None
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def benchmark_against_neighbours(slug, analysis, count=NEIGHBOURHOOD_SIZE):
+    """Compare a school's scores with the `count` nearest schools in the index."""
+    summary = analysis.get("detailed_analysis", {}).get("profile_summary", {})
+    coordinates = parse_coordinates(summary.get("latitude"), summary.get("longitude"))
+    if not coordinates:
+        return None
+
+    neighbours = get_spatial_index().nearest(*coordinates, count, exclude=slug)
+    if not neighbours:
+        return None
+
+    overall_score = analysis.get("overall_score", 0)
+    neighbour_scores = [point[2] for _, _, point in neighbours]
+    below = sum(1 for score in neighbour_scores if score < overall_score)
+    ties = sum(1 for score in neighbour_scores if score == overall_score)
+
+    lagging = []
+    for dimension, value in analysis.get("scores", {}).items():
+        values = [point[3].get(dimension) for _, _, point in neighbours if point[3].get(dimension) is not None]
+        neighbour_median = median(values)
+        if neighbour_median is not None and value < neighbour_median:
+            lagging.append({
+                "score": dimension,
+                "value": value,
+                "neighbour_median": round(neighbour_median, 1),
+                "gap": round(neighbour_median - value, 1),
+            })
+    lagging.sort(key=lambda item: -item["gap"])
+
+    return {
+        "neighbours_compared": len(neighbours),
+        "radius_km": round(neighbours[-1][0], 2),
+        "median_overall_score": round(median(neighbour_scores), 1),
+        "percentile": round((below + 0.5 * ties) / len(neighbours) * 100, 1),
+        "lagging_scores": lagging,
+        "nearest_schools": [
+            {"slug": other, "distance_km": round(distance, 2), "overall_score": point[2]}
+            for distance, other, point in neighbours[:5]
+        ],
+    }
+
+
+def index_scan_location(scan):
+    summary = scan.analysis.get("detailed_analysis", {}).get("profile_summary", {})
+    coordinates = parse_coordinates(summary.get("latitude"), summary.get("longitude"))
+    if coordinates:
+        spatial_index.upsert(scan.slug, *coordinates, scan.analysis.get("overall_score"), scan.analysis.get("scores"), scan.id)
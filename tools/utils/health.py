@@ -0,0 +1,114 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+
+from tools.utils import metrics
+
+
+HEALTH_PROBE_TTL_SECONDS = getattr(settings, "HEALTH_PROBE_TTL_SECONDS", 5)
+HEALTH_PROBE_TIMEOUT_SECONDS = getattr(settings, "HEALTH_PROBE_TIMEOUT_SECONDS", 2)
+READINESS_REQUIRES_UPSTREAM = getattr(settings, "HEALTH_READINESS_REQUIRES_UPSTREAM", False)
+
+
+class CachedProbe:
+    """
+    Runs a dependency check at most once per `ttl` seconds. The first call waits
+    for the result; after that callers always get the last result immediately and
+    a stale result triggers a single background refresh.
+    """
+
+    def __init__(self, name, check, ttl=HEALTH_PROBE_TTL_SECONDS):
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self.result = None
+        self.checked_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            result = self.check()
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+        with self._lock:
+            self.result = result
+            self.checked_at = time.monotonic()
+            self._refreshing = False
+
+    def _refresh_in_background(self):
+        try:
+            self.run()
+        finally:
+            connections.close_all()
+
+    def get(self):
+        with self._lock:
+            result, checked_at = self.result, self.checked_at
+            stale = checked_at is None or time.monotonic() - checked_at > self.ttl
+            start_refresh = stale and result is not None and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if result is None:
+            self.run()
+            with self._lock:
+                result, checked_at = self.result, self.checked_at
+        elif start_refresh:
+            threading.Thread(target=self._refresh_in_background, name=f"health-{self.name}", daemon=True).start()
+
+        return {**result, "age_seconds": round(time.monotonic() - checked_at, 1)}
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return {"ok": True, "vendor": connection.vendor}
+
+
+def check_upstream():
+    parts = urlsplit(settings.SCHOOL_PROFILE_API_URL)
+    url = f"{parts.scheme}://{parts.netloc}/"
+    response = requests.head(url, timeout=HEALTH_PROBE_TIMEOUT_SECONDS, allow_redirects=True)
+    return {"ok": response.status_code < 500, "status": response.status_code, "url": url}
+
+
+def check_cache():
+    key = "health:probe"
+    cache.set(key, "1", 10)
+    return {"ok": cache.get(key) == "1", "hit_rates": metrics.cache_hit_rates()}
+
+
+def check_queues():
+    gauges = metrics.snapshot()["gauges"]
+    return {"ok": True, "backlog": {name: value for name, value in gauges.items() if name.endswith(("backlog", "depth"))}}
+
+
+PROBES = {
+    "database": CachedProbe("database", check_database),
+    "upstream": CachedProbe("upstream", check_upstream),
+    "cache": CachedProbe("cache", check_cache),
+    "queues": CachedProbe("queues", check_queues),
+}
+
+
+def readiness():
+    required = ["database", "upstream"] if READINESS_REQUIRES_UPSTREAM else ["database"]
+    checks = {name: PROBES[name].get() for name in ["database", "upstream"]}
+    ready = all(checks[name]["ok"] for name in required)
+    return ready, checks
+
+
+def deep_health():
+    checks = {name: probe.get() for name, probe in PROBES.items()}
+    ready = checks["database"]["ok"] and (checks["upstream"]["ok"] or not READINESS_REQUIRES_UPSTREAM)
+    return ready, checks
@@ -0,0 +1,203 @@
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageFile
+
+from tools.utils import metrics
+from tools.utils.profile_loader import media_url
+
+
+MEDIA_CHECK_ENABLED = getattr(settings, "MEDIA_CHECK_ENABLED", True)
+MEDIA_CHECK_WORKERS = getattr(settings, "MEDIA_CHECK_WORKERS", 8)
+MEDIA_CHECK_MAX_IMAGES = getattr(settings, "MEDIA_CHECK_MAX_IMAGES", 60)  # per scan; the rest are extrapolated
+MEDIA_CHECK_TIMEOUT = (3, 5)  # connect, read
+# Wall-clock limit for all media checks of one scan; images not checked by then are left out
+MEDIA_CHECK_BUDGET_SECONDS = getattr(settings, "MEDIA_CHECK_BUDGET_SECONDS", 10)
+MEDIA_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+MEDIA_FAILURE_CACHE_TIMEOUT = 60 * 60
+
+MIN_IMAGE_WIDTH = 400
+MIN_IMAGE_HEIGHT = 300
+MAX_HASH_BYTES = 2 * 1024 * 1024
+HEADER_CHUNK_SIZE = 16 * 1024
+DUPLICATE_HASH_DISTANCE = 4  # bits out of 64
+
+_local = threading.local()
+# Shared by every scan, so concurrent scans never run more than MEDIA_CHECK_WORKERS fetches
+_pool = ThreadPoolExecutor(max_workers=MEDIA_CHECK_WORKERS, thread_name_prefix="media-check")
+metrics.register_gauge("media_check.backlog", lambda: _pool._work_queue.qsize())
+
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def cache_key(url):
+    return f"media:v1:{hashlib.sha1(url.encode()).hexdigest()}"
+
+
+def difference_hash(image):
+    """64-bit dHash: compares neighbouring pixels of a 9x8 greyscale thumbnail."""
+    image.draft("L", (64, 64))  # lets JPEG decode at reduced size
+    pixels = list(image.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def inspect_image(url):
+    """
+    Fetch just enough of an image to read its format and dimensions. Images large
+    enough to count are read on (up to MAX_HASH_BYTES) to compute a perceptual hash.
+    """
+    result = {"url": url, "ok": False}
+    try:
+        with _session().get(url, stream=True, timeout=MEDIA_CHECK_TIMEOUT) as response:
+            result["status"] = response.status_code
+            if response.status_code != 200:
+                return result
+
+            parser = ImageFile.Parser()
+            body = io.BytesIO()
+            chunks = response.iter_content(chunk_size=HEADER_CHUNK_SIZE)
+            for chunk in chunks:
+                body.write(chunk)
+                parser.feed(chunk)
+                if parser.image is not None:
+                    break
+
+            if parser.image is None:
+                result["error"] = "not an image"
+                return result
+
+            result.update({
+                "ok": True,
+                "format": parser.image.format,
+                "width": parser.image.width,
+                "height": parser.image.height,
+            })
+
+            if parser.image.width < MIN_IMAGE_WIDTH or parser.image.height < MIN_IMAGE_HEIGHT:
+                result["bytes_read"] = body.tell()
+                return result
+
+            for chunk in chunks:
+                body.write(chunk)
+                if body.tell() > MAX_HASH_BYTES:
+                    break
+            result["bytes_read"] = body.tell()
+
+        if result["bytes_read"] <= MAX_HASH_BYTES:
+            body.seek(0)
+            with Image.open(body) as image:
+                result["dhash"] = difference_hash(image)
+    except (requests.RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+        result["error"] = str(e)[:200]
+
+    return result
+
+
+def _cache_result(key, future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    timeout = MEDIA_CACHE_TIMEOUT if result["ok"] else MEDIA_FAILURE_CACHE_TIMEOUT
+    cache.set(key, result, timeout)
+
+
+def check_media(urls, deadline=None):
+    """
+    Inspect URLs concurrently on the shared pool; results are cached by URL.
+    URLs not inspected by `deadline` (a time.monotonic() value) are missing from
+    the result; their queued checks are cancelled, running ones finish and are cached.
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    keys = {url: cache_key(url) for url in urls}
+    cached = cache.get_many(list(keys.values()))
+
+    results = {}
+    missing = []
+    for url in urls:
+        if keys[url] in cached:
+            results[url] = cached[keys[url]]
+        else:
+            missing.append(url)
+    metrics.incr("media_check.hit", len(results))
+    metrics.incr("media_check.miss", len(missing))
+
+    if missing:
+        futures = []
+        for url in missing:
+            future = _pool.submit(inspect_image, url)
+            future.add_done_callback(lambda future, key=keys[url]: _cache_result(key, future))
+            futures.append(future)
+        done, not_done = wait(futures, timeout=None if deadline is None else max(0, deadline - time.monotonic()))
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            results[future.result()["url"]] = future.result()
+        if not_done:
+            metrics.incr("media_check.over_budget", len(not_done))
+
+    return results
+
+
+def group_duplicates(hashes):
+    """Number of images that are near-duplicates of an earlier image in the list."""
+    seen = []
+    duplicates = 0
+    for value in hashes:
+        if any(bin(value ^ other).count("1") <= DUPLICATE_HASH_DISTANCE for other in seen):
+            duplicates += 1
+        else:
+            seen.append(value)
+    return duplicates
+
+
+def summarise_media(items, max_images=MEDIA_CHECK_MAX_IMAGES, deadline=None):
+    """Check a list of media items and summarise how many are usable (None if none could be checked)."""
+    urls = [media_url(item) for item in items]
+    sample = [url for url in urls if url][:max_images]
+    if not sample:
+        return None
+
+    results = check_media(sample, deadline=deadline)
+    checked = [results[url] for url in sample if url in results]
+    if not checked:
+        return None
+    broken = sum(1 for r in checked if not r["ok"])
+    small = sum(1 for r in checked if r["ok"] and (r["width"] < MIN_IMAGE_WIDTH or r["height"] < MIN_IMAGE_HEIGHT))
+    duplicates = group_duplicates([int(r["dhash"], 16) for r in checked if r.get("dhash")])
+    usable = len(checked) - broken - small - duplicates
+
+    return {
+        "total_images": len(urls),
+        "checked_images": len(checked),
+        "broken_images": broken,
+        "low_resolution_images": small,
+        "duplicate_images": duplicates,
+        "usable_images": usable,
+        # Unchecked images are assumed to be usable at the same rate as the checked sample
+        "estimated_usable_images": round(usable / len(checked) * len(urls)),
+        "formats": sorted({r["format"] for r in checked if r.get("format")}),
+    }
+
+
+def check_profile_media(data, budget_seconds=MEDIA_CHECK_BUDGET_SECONDS):
+    deadline = time.monotonic() + budget_seconds
+    gallery_images = data.get("gallery", {}).get("images", [])
+    infrastructure_images = [image for infra in data.get("infrastruture", []) for image in infra.get("images") or []]
+    return {
+        "gallery": summarise_media(gallery_images, deadline=deadline),
+        "infrastructure": summarise_media(infrastructure_images, deadline=deadline),
+    }
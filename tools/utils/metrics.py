@@ -0,0 +1,47 @@
+import threading
+from collections import defaultdict
+
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_gauges = {}
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def register_gauge(name, callback):
+    """Register a zero-argument callable read whenever metrics are collected, e.g. a queue length."""
+    _gauges[name] = callback
+
+
+def cache_hit_rates():
+    """Hit rate per cache, from counters named "<cache>.hit" and "<cache>.miss"."""
+    with _lock:
+        counters = dict(_counters)
+
+    rates = {}
+    for name in counters:
+        if not name.endswith(".hit"):
+            continue
+        cache = name[:-len(".hit")]
+        hits = counters[name]
+        misses = counters.get(f"{cache}.miss", 0)
+        rates[cache] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+    return rates
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+
+    gauges = {}
+    for name, callback in list(_gauges.items()):
+        try:
+            gauges[name] = callback()
+        except Exception as e:
+            gauges[name] = f"error: {e}"
+
+    return {"counters": counters, "gauges": gauges}
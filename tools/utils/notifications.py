@@ -0,0 +1,170 @@
+import hashlib
+import heapq
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from tools.utils import metrics
+from tools.utils.analyser import scan_school_profile
+
+logger = logging.getLogger(__name__)
+
+
+CHANGE_DEBOUNCE_SECONDS = getattr(settings, "CHANGE_NOTIFICATION_DEBOUNCE_SECONDS", 30)
+# A school edited non-stop is still re-analysed this long after its first pending event
+CHANGE_MAX_DELAY_SECONDS = getattr(settings, "CHANGE_NOTIFICATION_MAX_DELAY_SECONDS", 300)
+CHANGE_WORKERS = getattr(settings, "CHANGE_NOTIFICATION_WORKERS", 2)
+CHANGE_QUEUE_LIMIT = getattr(settings, "CHANGE_NOTIFICATION_QUEUE_LIMIT", 10000)
+CHANGE_NOTIFICATION_SECRET = getattr(settings, "CHANGE_NOTIFICATION_SECRET", None)
+SEEN_EVENT_IDS = 10000
+
+SLUG_RE = re.compile(r"^[-\w]+$")
+
+
+def verify_signature(body, signature, secret=CHANGE_NOTIFICATION_SECRET):
+    """
+    Check an `X-Signature: sha256=<hex>` HMAC of the raw body. Without a
+    configured secret every request is refused, unless DEBUG is on.
+    """
+    if not secret:
+        return settings.DEBUG
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+class ChangeNotificationQueue:
+    """
+    Debounces "profile changed" events per slug and re-analyses each school once
+    its events go quiet for `debounce` seconds, on at most `workers` threads.
+
+    Events for a slug that is already pending just push its due time back (never
+    beyond `max_delay` after the first one); events arriving while the slug is
+    being scanned schedule one more scan afterwards. Repeated event ids are ignored.
+    """
+
+    def __init__(self, debounce=CHANGE_DEBOUNCE_SECONDS, max_delay=CHANGE_MAX_DELAY_SECONDS,
+                 workers=CHANGE_WORKERS, limit=CHANGE_QUEUE_LIMIT):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.workers = workers
+        self.limit = limit
+        self.pending = {}  # slug -> (first event at, due at)
+        self.queue = []  # (due at, slug) heap; entries superseded in `pending` are skipped
+        self.running = set()
+        self.rerun = set()
+        self.seen = OrderedDict()
+        self._condition = threading.Condition()
+        self._pool = None
+
+        metrics.register_gauge("change_notifications.backlog", lambda: len(self.pending))
+        metrics.register_gauge("change_notifications.active", lambda: len(self.running))
+
+    def _schedule(self, slug, current):
+        first, _ = self.pending.get(slug, (current, None))
+        due = min(current + self.debounce, first + self.max_delay)
+        self.pending[slug] = (first, due)
+        heapq.heappush(self.queue, (due, slug))
+
+    def notify(self, slug, event_id=None):
+        """Record an event for `slug`. Returns "queued", "coalesced", "duplicate" or "rejected"."""
+        with self._condition:
+            if event_id is not None and event_id in self.seen:
+                metrics.incr("change_notifications.duplicate")
+                return "duplicate"
+
+            if slug in self.running:
+                self.rerun.add(slug)
+                status = "coalesced"
+            elif slug in self.pending:
+                self._schedule(slug, time.monotonic())
+                status = "coalesced"
+            elif len(self.pending) >= self.limit:
+                status = "rejected"
+            else:
+                self._schedule(slug, time.monotonic())
+                status = "queued"
+
+            # A rejected event is not remembered, so the sender's retry is accepted
+            if event_id is not None and status != "rejected":
+                self.seen[event_id] = True
+                if len(self.seen) > SEEN_EVENT_IDS:
+                    self.seen.popitem(last=False)
+
+            self._start()
+            self._condition.notify_all()
+        metrics.incr(f"change_notifications.{status}")
+        return status
+
+    def _start(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="change-notifications")
+            threading.Thread(target=self._dispatch, name="change-notifications-dispatch", daemon=True).start()
+
+    def _pop_due(self, current):
+        while self.queue and self.queue[0][0] <= current:
+            due, slug = heapq.heappop(self.queue)
+            if self.pending.get(slug, (None, None))[1] == due:
+                del self.pending[slug]
+                return slug
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    slug = self._pop_due(time.monotonic()) if len(self.running) < self.workers else None
+                    if slug:
+                        break
+                    timeout = None
+                    if self.queue and len(self.running) < self.workers:
+                        timeout = max(0, self.queue[0][0] - time.monotonic())
+                    self._condition.wait(timeout)
+                self.running.add(slug)
+            self._pool.submit(self._process, slug)
+
+    def _process(self, slug):
+        close_old_connections()
+        try:
+            scan = scan_school_profile(slug, check_media=True)
+            metrics.incr("change_notifications.processed" if scan else "change_notifications.not_found")
+        except Exception:
+            metrics.incr("change_notifications.failed")
+            logger.exception("Re-analysis of %s after a change notification failed", slug)
+        finally:
+            close_old_connections()
+            with self._condition:
+                self.running.discard(slug)
+                if slug in self.rerun:
+                    self.rerun.discard(slug)
+                    self._schedule(slug, time.monotonic())
+                self._condition.notify_all()
+
+    def status(self):
+        with self._condition:
+            return {"pending": len(self.pending), "running": len(self.running)}
+
+
+change_notifications = ChangeNotificationQueue()
+
+
+def parse_change_events(payload):
+    """Normalise a single event or {"events": [...]} into (slug, event_id) pairs."""
+    events = payload.get("events") if isinstance(payload, dict) and "events" in payload else [payload]
+    if not isinstance(events, list) or not events:
+        raise ValueError("Provide a {slug, event_id} object or {'events': [...]}")
+
+    parsed = []
+    for event in events:
+        slug = event.get("slug") if isinstance(event, dict) else None
+        if not isinstance(slug, str) or not SLUG_RE.match(slug):
+            raise ValueError("Every event needs a valid 'slug'")
+        event_id = event.get("event_id")
+        parsed.append((slug, str(event_id) if event_id is not None else None))
+    return parsed
@@ -0,0 +1,287 @@
+import json
+import re
+
+
+KEEP = "keep"  # materialise the value as-is
+COUNT = "count"  # arrays are reduced to their length
+MEDIA_URL = "media_url"  # a media item is reduced to its URL
+
+MEDIA_URL_KEYS = ("image", "url", "file", "src")
+
+# Fields of the upstream school document that the scoring rules read. Anything not
+# listed is skipped without being decoded; a dict describes the fields kept from a
+# nested object and a one-item list describes every element of an array.
+PROFILE_FIELD_SPEC = {
+    "name": KEEP,
+    "slug": KEEP,
+    "logo": KEEP,
+    "email": KEEP,
+    "phone_no": KEEP,
+    "website": KEEP,
+    "short_name": KEEP,
+    "boards": KEEP,
+    "classes_offered": KEEP,
+    "medium": KEEP,
+    "languages_taught": KEEP,
+    "academic_session": KEEP,
+    "student_teacher_ratio": KEEP,
+    "format": KEEP,
+    "about": KEEP,
+    "usp": KEEP,
+    "awards": KEEP,
+    "pre_post_admission_process": KEEP,
+    "withdrawl_policy": KEEP,
+    "scholarship": KEEP,
+    "life_at_school": KEEP,
+    "infra_and_facilities": KEEP,
+    "leader_messages": COUNT,
+    "events": COUNT,
+    "news": COUNT,
+    "gallery": {
+        "images": [MEDIA_URL],
+        "videos": COUNT,
+        "display_images": COUNT,
+        "virtual_tour": KEEP,
+    },
+    "infrastruture": [{"images": [MEDIA_URL]}],
+    "feature_facilities": [{"features": COUNT}],
+    "classes": [{"name": KEEP}],
+    "internal": {"selected_session": KEEP},
+    "fees_structure": KEEP,
+    "admissions": {
+        "documents": COUNT,
+        "school_timings": KEEP,
+        "openSession": KEEP,
+    },
+    "address": KEEP,
+    "verified_by_school": KEEP,
+    "year_of_establishment": KEEP,
+    "built_in_area": KEEP,
+    "number_of_students": KEEP,
+    "brochure": KEEP,
+    "views": KEEP,
+}
+
+
+def media_url(item):
+    """URL of a gallery/infrastructure media item, which upstream sends as a string or an object."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        for key in MEDIA_URL_KEYS:
+            if isinstance(item.get(key), str):
+                return item[key]
+    return None
+
+
+class CountedList(list):
+    """
+    Stand-in for an array that was only counted: len() and truthiness behave like
+    the original list, but no elements are held.
+    """
+
+    def __init__(self, count):
+        super().__init__()
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __repr__(self):
+        return f"CountedList({self.count})"
+
+
+_WHITESPACE_RE = re.compile(rb"[ \t\r\n]*")
+# Everything up to the next bracket, stepping over complete strings in one match
+_SKIP_RE = re.compile(rb'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")*')
+_SCALAR_RE = re.compile(rb"[^,\]}\s]+")
+
+
+class _ChunkReader:
+    """Pull parser over an iterable of byte chunks that only buffers unread input (and the value being kept)."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf = b""
+        self.pos = 0
+        self.mark = None
+        self.bytes_parsed = 0
+        self.bytes_retained = 0
+
+    def fill(self):
+        chunk = next(self.chunks, None)
+        while chunk is not None and not chunk:
+            chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+
+        keep_from = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep_from:] + chunk
+        self.pos -= keep_from
+        if self.mark is not None:
+            self.mark -= keep_from
+        self.bytes_parsed += len(chunk)
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos:self.pos + 1]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at byte {self.bytes_parsed - len(self.buf) + self.pos}")
+        self.pos += 1
+
+    def skip_string(self):
+        offset = 1  # relative to self.pos, which compaction may shift
+        while True:
+            end = self.buf.find(b'"', self.pos + offset)
+            if end == -1:
+                offset = len(self.buf) - self.pos
+                if not self.fill():
+                    raise ValueError("Unterminated string")
+                continue
+            backslashes = 0
+            while self.buf[end - 1 - backslashes] == 0x5C:
+                backslashes += 1
+            if backslashes % 2 == 0:
+                self.pos = end + 1
+                return
+            offset = end + 1 - self.pos
+
+    def skip_scalar(self):
+        while True:
+            match = _SCALAR_RE.match(self.buf, self.pos)
+            if match and match.end() < len(self.buf):
+                self.pos = match.end()
+                return
+            if not self.fill():
+                self.pos = match.end() if match else self.pos
+                return
+
+    def skip_value(self):
+        first = self.peek()
+        if first == b'"':
+            return self.skip_string()
+        if first not in (b"{", b"["):
+            return self.skip_scalar()
+
+        depth = 0
+        while True:
+            self.pos = _SKIP_RE.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf):
+                if not self.fill():
+                    raise ValueError("Unterminated container")
+                continue
+            char = self.buf[self.pos:self.pos + 1]
+            if char == b'"':
+                # A string cut off by the end of the buffer
+                self.skip_string()
+                continue
+            self.pos += 1
+            depth += 1 if char in (b"{", b"[") else -1
+            if depth == 0:
+                return
+
+    def read_value(self):
+        self.peek()
+        self.mark = self.pos
+        try:
+            self.skip_value()
+            raw = self.buf[self.mark:self.pos]
+        finally:
+            self.mark = None
+        self.bytes_retained += len(raw)
+        return json.loads(raw)
+
+    def count_array(self):
+        self.expect(b"[")
+        count = 0
+        if self.peek() == b"]":
+            self.pos += 1
+            return count
+        while True:
+            self.skip_value()
+            count += 1
+            if self.peek() == b",":
+                self.pos += 1
+                continue
+            self.expect(b"]")
+            return count
+
+    def read_with_spec(self, spec):
+        if spec == KEEP:
+            return self.read_value()
+        first = self.peek()
+        if spec == COUNT and first == b"[":
+            return CountedList(self.count_array())
+        if isinstance(spec, dict) and first == b"{":
+            return self.read_object(spec)
+        if isinstance(spec, list) and first == b"[":
+            return self.read_array(spec[0])
+        if spec == MEDIA_URL and first == b"{":
+            return media_url(self.read_object({key: KEEP for key in MEDIA_URL_KEYS}))
+        # Unexpected shape (null, string, ...): keep it so the scoring rules see the real value
+        return self.read_value()
+
+    def read_object(self, spec):
+        self.expect(b"{")
+        result = {}
+        if self.peek() == b"}":
+            self.pos += 1
+            return result
+        while True:
+            if self.peek() != b'"':
+                raise ValueError("Expected an object key")
+            key = self.read_value()
+            self.expect(b":")
+            field_spec = spec.get(key)
+            if field_spec is None:
+                self.skip_value()
+            else:
+                result[key] = self.read_with_spec(field_spec)
+            if self.peek() == b",":
+                self.pos += 1
+                continue
+            self.expect(b"}")
+            return result
+
+    def read_array(self, item_spec):
+        self.expect(b"[")
+        items = []
+        if self.peek() == b"]":
+            self.pos += 1
+            return items
+        while True:
+            items.append(self.read_with_spec(item_spec))
+            if self.peek() == b",":
+                self.pos += 1
+                continue
+            self.expect(b"]")
+            return items
+
+
+def load_school_profile(chunks, spec=PROFILE_FIELD_SPEC):
+    """
+    Incrementally parse an upstream school document from byte chunks (e.g.
+    `response.iter_content()`), keeping only the fields in `spec`.
+    Returns (data, stats) where stats compares bytes parsed with bytes retained.
+    """
+    reader = _ChunkReader(chunks)
+    data = reader.read_with_spec(spec)
+    if not isinstance(data, dict):
+        raise ValueError("School profile is not a JSON object")
+
+    stats = {
+        "bytes_parsed": reader.bytes_parsed,
+        "bytes_retained": reader.bytes_retained,
+        "retained_ratio": round(reader.bytes_retained / reader.bytes_parsed, 4) if reader.bytes_parsed else 0,
+    }
+    return data, stats
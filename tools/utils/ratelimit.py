@@ -0,0 +1,34 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available. Returns 0 on success, otherwise seconds until they would be."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate if self.rate else float("inf")
+
+    def acquire(self, tokens=1):
+        """Block until tokens are available."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.utils.timezone import localdate
+
+from tools.models import SchoolProfileScan
+from tools.utils import metrics
+from tools.utils.analyser import (
+    FEATURES_VERSION,
+    RULES_VERSION,
+    get_confidence_level,
+    score_delta,
+    score_profile_features,
+)
+from tools.utils.rollups import rebuild_rollups
+
+
+def stored_score(value):
+    # What the score column keeps (it truncates fractional scores), as trends read it back
+    return SchoolProfileScan._meta.get_field("score").to_python(value)
+
+
+def rescore_history(history, force=False):
+    """
+    Re-score one school's scans, given oldest first, from their stored features.
+    Returns the scans that were re-scored, with `score`, `analysis` and
+    `rules_version` updated in place, and counts of the ones left alone.
+
+    As at scan time, each scan's trend compares the two scans before it, now
+    using their new scores. The neighbourhood benchmark is kept as stored.
+    """
+    rescored = []
+    skipped = {"current": 0, "no_features": 0}
+    scores = []
+
+    for scan in history:
+        features = scan.features
+        if not features or features.get("features_version") != FEATURES_VERSION:
+            skipped["no_features"] += 1
+        elif scan.rules_version == RULES_VERSION and not force:
+            skipped["current"] += 1
+        else:
+            analysis = score_profile_features(features)
+            if len(scores) >= 2:
+                analysis["trend"] = score_delta(*scores[-1], *scores[-2])
+            analysis["confidence_level"] = get_confidence_level(analysis.get("overall_score", 0))
+            if "neighbourhood" in scan.analysis:
+                analysis["neighbourhood"] = scan.analysis["neighbourhood"]
+
+            scan.previous_score = scan.score
+            scan.score = stored_score(analysis["overall_score"])
+            scan.analysis = analysis
+            scan.rules_version = RULES_VERSION
+            rescored.append(scan)
+        scores.append((scan.score, scan.created_at))
+
+    return rescored, skipped
+
+
+def rescore_scans(slugs=None, force=False, batch_size=500, rollups=True, dry_run=False, log=None):
+    """
+    Re-score stored scans under the current RULES_VERSION from their features
+    alone (no upstream or media requests), writing `batch_size` scans per
+    transaction, then rebuild the score rollups from the first re-scored day.
+    """
+    if slugs is None:
+        slugs = SchoolProfileScan.objects.order_by("slug").values_list("slug", flat=True).distinct()
+
+    report = {"examined": 0, "rescored": 0, "changed": 0, "skipped_current": 0, "skipped_no_features": 0,
+              "mean_change": 0, "max_change": 0, "rollups_since": None, "rollups_written": None}
+    total_change = 0
+    pending = []
+    since = None
+
+    def flush():
+        if pending and not dry_run:
+            with transaction.atomic():
+                SchoolProfileScan.objects.bulk_update(pending, ["score", "analysis", "rules_version"], batch_size=batch_size)
+            metrics.incr("rescore.written", len(pending))
+        pending.clear()
+
+    for slug in list(slugs):
+        history = list(
+            SchoolProfileScan.objects.filter(slug=slug).order_by("created_at", "id")
+            .only("id", "slug", "created_at", "score", "analysis", "features", "rules_version")
+        )
+        rescored, skipped = rescore_history(history, force=force)
+        report["examined"] += len(history)
+        report["skipped_current"] += skipped["current"]
+        report["skipped_no_features"] += skipped["no_features"]
+
+        for scan in rescored:
+            change = abs((scan.score or 0) - (scan.previous_score or 0))
+            if change:
+                report["changed"] += 1
+                total_change += change
+                report["max_change"] = max(report["max_change"], change)
+            # Sub-scores can move without the overall score, so any re-scored day is rebuilt
+            day = localdate(scan.created_at)
+            since = day if since is None else min(since, day)
+            pending.append(scan)
+        report["rescored"] += len(rescored)
+
+        if len(pending) >= batch_size:
+            flush()
+            if log:
+                log(f"{report['examined']} scans examined, {report['rescored']} re-scored")
+    flush()
+
+    if report["rescored"]:
+        report["mean_change"] = round(total_change / report["rescored"], 2)
+    if rollups and since is not None and not dry_run:
+        report["rollups_since"] = since
+        report["rollups_written"] = rebuild_rollups(since=since)
+    return report
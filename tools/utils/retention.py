@@ -0,0 +1,119 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum, TextField
+from django.db.models.functions import Cast, Length
+from django.utils.timezone import localdate, now
+
+from tools.models import SchoolProfileScan
+
+
+RETENTION_KEEP_ALL_DAYS = getattr(settings, "SCAN_RETENTION_KEEP_ALL_DAYS", 14)
+RETENTION_DAILY_DAYS = getattr(settings, "SCAN_RETENTION_DAILY_DAYS", 90)
+
+
+def scans_to_keep(history, keep_all_after, daily_after):
+    """
+    Ids to keep from one school's scans, given as (id, created_at, score) oldest first.
+
+    Keeps every scan newer than `keep_all_after`, the last scan of each day newer
+    than `daily_after`, the last scan of each week before that, and always the
+    first scan, the latest scan and every scan whose score differs from the one before.
+    """
+    keep = {history[0][0], history[-1][0]}
+    last_in_bucket = {}
+    previous_score = history[0][2]
+
+    for scan_id, created_at, score in history:
+        if score != previous_score:
+            keep.add(scan_id)
+        previous_score = score
+
+        if created_at >= keep_all_after:
+            keep.add(scan_id)
+        elif created_at >= daily_after:
+            last_in_bucket[("day", localdate(created_at))] = scan_id
+        else:
+            last_in_bucket[("week", localdate(created_at).isocalendar()[:2])] = scan_id
+
+    keep.update(last_in_bucket.values())
+    return keep
+
+
+def plan_compaction(keep_all_days=RETENTION_KEEP_ALL_DAYS, daily_days=RETENTION_DAILY_DAYS):
+    """Ids of the scans the retention policy would delete, and the number of scans examined."""
+    current = now()
+    keep_all_after = current - timedelta(days=keep_all_days)
+    daily_after = current - timedelta(days=max(daily_days, keep_all_days))
+
+    rows = SchoolProfileScan.objects.order_by("slug", "created_at", "id").values_list("slug", "id", "created_at", "score")
+
+    doomed = []
+    examined = 0
+    slug, history = None, []
+    for row_slug, scan_id, created_at, score in rows.iterator(chunk_size=5000):
+        examined += 1
+        if row_slug != slug and history:
+            keep = scans_to_keep(history, keep_all_after, daily_after)
+            doomed.extend(scan_id for scan_id, _, _ in history if scan_id not in keep)
+            history = []
+        slug = row_slug
+        history.append((scan_id, created_at, score))
+
+    if history:
+        keep = scans_to_keep(history, keep_all_after, daily_after)
+        doomed.extend(scan_id for scan_id, _, _ in history if scan_id not in keep)
+
+    return doomed, examined
+
+
+def sqlite_file_bytes():
+    """Bytes used by the SQLite file, or None on other databases."""
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+    return page_size * page_count
+
+
+def compact_scans(keep_all_days=RETENTION_KEEP_ALL_DAYS, daily_days=RETENTION_DAILY_DAYS,
+                  batch_size=500, pause=0.1, vacuum=True, dry_run=False, log=None):
+    """
+    Delete scans outside the retention policy in batches of `batch_size`, each in
+    its own transaction and followed by `pause` seconds so the app keeps getting
+    the write lock. On SQLite the file is VACUUMed afterwards to return the space.
+    """
+    doomed, examined = plan_compaction(keep_all_days, daily_days)
+    report = {
+        "examined": examined,
+        "deleted": 0,
+        "to_delete": len(doomed),
+        "analysis_bytes_deleted": 0,
+        "file_bytes_before": sqlite_file_bytes(),
+        "file_bytes_after": None,
+    }
+    if dry_run:
+        return report
+
+    for start in range(0, len(doomed), batch_size):
+        batch = doomed[start:start + batch_size]
+        with transaction.atomic():
+            scans = SchoolProfileScan.objects.filter(id__in=batch)
+            payload = scans.aggregate(total=Sum(Length(Cast("analysis", TextField()))))["total"] or 0
+            # Cascades to the content signatures stored with each scan
+            scans.delete()
+        report["deleted"] += len(batch)
+        report["analysis_bytes_deleted"] += payload
+        if log:
+            log(f"Deleted {report['deleted']}/{len(doomed)} scans")
+        if pause:
+            time.sleep(pause)
+
+    if vacuum and report["deleted"] and connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+    report["file_bytes_after"] = sqlite_file_bytes()
+    return report
@@ -0,0 +1,120 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from tools.models import SchoolProfileScan
+from tools.utils import metrics
+from tools.utils.analyser import scan_school_profile
+
+logger = logging.getLogger(__name__)
+
+
+# Stored scans younger than this are served as-is
+ANALYSER_FRESH_SECONDS = getattr(settings, "ANALYSER_FRESH_SECONDS", 60 * 60)
+# Up to this age they are served while a background refresh runs; older ones block on a new scan
+ANALYSER_STALE_SECONDS = getattr(settings, "ANALYSER_STALE_SECONDS", 60 * 60 * 24)
+ANALYSER_REFRESH_WORKERS = getattr(settings, "ANALYSER_REFRESH_WORKERS", 4)
+REFRESH_LOCK_SECONDS = 120
+
+
+class SingleFlight:
+    """Concurrent callers of do() with the same key share one execution of the function."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            metrics.incr("revalidate.shared")
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+scans_in_flight = SingleFlight()
+_refresh_pool = ThreadPoolExecutor(max_workers=ANALYSER_REFRESH_WORKERS, thread_name_prefix="analyser-refresh")
+metrics.register_gauge("revalidate.backlog", lambda: _refresh_pool._work_queue.qsize())
+
+
+def rescan(slug, check_media=False):
+    return scans_in_flight.do(slug, lambda: scan_school_profile(slug, check_media=check_media))
+
+
+def _background_refresh(slug):
+    close_old_connections()
+    try:
+        rescan(slug, check_media=True)
+        metrics.incr("revalidate.refreshed")
+    except Exception:
+        metrics.incr("revalidate.failed")
+        logger.exception("Background refresh of %s failed", slug)
+    finally:
+        cache.delete(f"revalidate:{slug}")
+        close_old_connections()
+
+
+def refresh_in_background(slug):
+    """Start a refresh unless one is already running for the slug (here or, with a shared cache, in another process)."""
+    if scans_in_flight.in_flight(slug) or not cache.add(f"revalidate:{slug}", True, REFRESH_LOCK_SECONDS):
+        return False
+    _refresh_pool.submit(_background_refresh, slug)
+    return True
+
+
+def read_stored_scan(slug, fresh_seconds=ANALYSER_FRESH_SECONDS, stale_seconds=ANALYSER_STALE_SECONDS):
+    """
+    Latest stored scan for `slug` and whether it can be served without waiting:
+    "fresh" (within the freshness window), "stale" (within the stale limit; a
+    background refresh is started) or None (missing or too old to serve).
+    """
+    scan = SchoolProfileScan.objects.filter(slug=slug).order_by("-created_at").first()
+    if scan is not None:
+        age = (now() - scan.created_at).total_seconds()
+        if age <= fresh_seconds:
+            metrics.incr("revalidate.hit")
+            return scan, "fresh"
+        if age <= stale_seconds:
+            metrics.incr("revalidate.hit")
+            refresh_in_background(slug)
+            return scan, "stale"
+
+    metrics.incr("revalidate.miss")
+    return scan, None
+
+
+def revalidate(slug, stored=None):
+    """Scan now (sharing any scan already in flight). Falls back to `stored` if upstream has no profile."""
+    scan = rescan(slug)
+    if scan is None and stored is not None:
+        return stored, "stale"
+    return scan, "miss"
+
+
+def scan_age_seconds(scan):
+    return max(0, int((now() - scan.created_at) / timedelta(seconds=1)))
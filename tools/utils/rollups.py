@@ -0,0 +1,207 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import localdate, now
+
+from tools.models import SchoolProfileScan, ScoreRollup
+from tools.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+ROLLUP_DIMENSIONS = [choice for choice, _ in ScoreRollup.DIMENSION_CHOICES]
+ROLLUP_METRICS = [
+    "overall_score",
+    "profile_completeness_score",
+    "data_quality_score",
+    "content_richness_score",
+    "visual_content_score",
+    "contact_accessibility_score",
+    "academic_information_score",
+    "infrastructure_score",
+    "fee_completeness_score",
+]
+ROLLUP_PERCENTILES = [10, 25, 50, 75, 90]
+HISTOGRAM_SIZE = 101
+UPDATE_ATTEMPTS = 20
+
+
+def rollup_keys(analysis):
+    """(dimension, key) pairs a scan contributes to."""
+    summary = analysis.get("detailed_analysis", {}).get("profile_summary", {})
+    district = summary.get("district")
+    if not district:
+        # Scans from before district was recorded only carry "area, district"
+        district = (summary.get("location") or "").split(",")[-1].strip()
+
+    keys = [("district", district or "Not specified"), ("format", summary.get("school_type") or "Not specified")]
+    boards = summary.get("boards") or []
+    keys += [("board", str(board)) for board in boards] or [("board", "Not specified")]
+    return keys
+
+
+def rollup_values(analysis):
+    scores = analysis.get("scores", {})
+    values = {"overall_score": analysis.get("overall_score")}
+    values.update({metric: scores.get(metric) for metric in ROLLUP_METRICS if metric != "overall_score"})
+    return {metric: float(value) for metric, value in values.items() if isinstance(value, (int, float))}
+
+
+def apply_values(rollup, values, sign=1):
+    rollup.count = max(0, rollup.count + sign)
+    for metric, value in values.items():
+        rollup.sums[metric] = round(rollup.sums.get(metric, 0) + sign * value, 4)
+        histogram = rollup.histograms.setdefault(metric, [0] * HISTOGRAM_SIZE)
+        bucket = min(HISTOGRAM_SIZE - 1, max(0, int(round(value))))
+        histogram[bucket] = max(0, histogram[bucket] + sign)
+
+
+def record_scan(scan):
+    """
+    Fold a newly written scan into its daily rollups. A school counts once per
+    day: if it was already scanned that day, the earlier scan is swapped out.
+    """
+    day = localdate(scan.created_at)
+    previous = (
+        SchoolProfileScan.objects.filter(slug=scan.slug, id__lt=scan.id)
+        .order_by("-id")
+        .only("created_at", "analysis")
+        .first()
+    )
+    replaced = previous if previous and localdate(previous.created_at) == day else None
+
+    if replaced:
+        for dimension, key in rollup_keys(replaced.analysis):
+            update_rollup(day, dimension, key, rollup_values(replaced.analysis), sign=-1)
+
+    for dimension, key in rollup_keys(scan.analysis):
+        update_rollup(day, dimension, key, rollup_values(scan.analysis))
+
+
+def update_rollup(day, dimension, key, values, sign=1):
+    """
+    Read-modify-write of one rollup row, retried if another writer got there first.
+    select_for_update() is a no-op on SQLite, so each write only lands if the
+    row's version is still the one read.
+    """
+    for _ in range(UPDATE_ATTEMPTS):
+        if sign > 0:
+            rollup, _ = ScoreRollup.objects.get_or_create(day=day, dimension=dimension, key=key)
+        else:
+            rollup = ScoreRollup.objects.filter(day=day, dimension=dimension, key=key).first()
+            if rollup is None:
+                return
+        apply_values(rollup, values, sign=sign)
+        updated = ScoreRollup.objects.filter(pk=rollup.pk, version=rollup.version).update(
+            count=rollup.count,
+            sums=rollup.sums,
+            histograms=rollup.histograms,
+            version=F("version") + 1,
+            updated_at=now(),
+        )
+        if updated:
+            return
+        metrics.incr("rollups.update_conflict")
+    metrics.incr("rollups.update_failed")
+    logger.error("Gave up updating the %s=%s rollup for %s; rebuild_score_rollups will repair it", dimension, key, day)
+
+
+def rebuild_rollups(since=None, batch_size=2000):
+    """Recompute rollups from scan history (from `since` onwards, or everything). Returns rows written."""
+    scans = SchoolProfileScan.objects.all()
+    rollups = ScoreRollup.objects.all()
+    if since:
+        scans = scans.filter(created_at__date__gte=since)
+        rollups = rollups.filter(day__gte=since)
+
+    # Last scan per (slug, day): scans are read oldest first so later ones overwrite
+    daily_latest = {}
+    rows = scans.order_by("id").values_list("slug", "created_at", "analysis")
+    for slug, created_at, analysis in rows.iterator(chunk_size=batch_size):
+        daily_latest[(slug, localdate(created_at))] = (rollup_keys(analysis), rollup_values(analysis))
+
+    built = {}
+    for (_, day), (keys, values) in daily_latest.items():
+        for dimension, key in keys:
+            rollup = built.get((day, dimension, key))
+            if rollup is None:
+                rollup = built[(day, dimension, key)] = ScoreRollup(day=day, dimension=dimension, key=key, sums={}, histograms={})
+            apply_values(rollup, values)
+
+    with transaction.atomic():
+        rollups.delete()
+        ScoreRollup.objects.bulk_create(built.values(), batch_size=500)
+    return len(built)
+
+
+def histogram_percentile(histogram, count, percentile):
+    target = count * percentile / 100
+    running = 0
+    for value, bucket_count in enumerate(histogram):
+        running += bucket_count
+        if running >= target and bucket_count:
+            return value
+    return None
+
+
+def summarise(count, sums, histograms, metrics):
+    summary = {"count": count}
+    for metric in metrics:
+        histogram = histograms.get(metric)
+        if not count or not histogram:
+            continue
+        summary[metric] = {
+            "mean": round(sums.get(metric, 0) / count, 1),
+            **{f"p{p}": histogram_percentile(histogram, count, p) for p in ROLLUP_PERCENTILES},
+        }
+    return summary
+
+
+def get_aggregates(dimension, days=30, key=None, metrics=None, series=False):
+    """
+    Merge daily rollups over the last `days` days per key. Counts are
+    school-days: a school scanned on several days counts once for each.
+    """
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"dimension must be one of: {', '.join(ROLLUP_DIMENSIONS)}")
+    metrics = metrics or ROLLUP_METRICS
+    unknown = set(metrics) - set(ROLLUP_METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+
+    start = localdate(now()) - timedelta(days=days - 1)
+    rollups = ScoreRollup.objects.filter(dimension=dimension, day__gte=start)
+    if key:
+        rollups = rollups.filter(key=key)
+
+    merged = defaultdict(lambda: {"count": 0, "sums": defaultdict(float), "histograms": {}})
+    daily = defaultdict(list)
+    for rollup in rollups.order_by("day").iterator():
+        if not rollup.count:
+            continue
+        bucket = merged[rollup.key]
+        bucket["count"] += rollup.count
+        for metric in metrics:
+            bucket["sums"][metric] += rollup.sums.get(metric, 0)
+            histogram = rollup.histograms.get(metric)
+            if histogram:
+                current = bucket["histograms"].setdefault(metric, [0] * HISTOGRAM_SIZE)
+                bucket["histograms"][metric] = [a + b for a, b in zip(current, histogram)]
+        if series:
+            daily[rollup.key].append({
+                "day": rollup.day.isoformat(),
+                **summarise(rollup.count, rollup.sums, rollup.histograms, metrics),
+            })
+
+    results = []
+    for rollup_key, bucket in merged.items():
+        result = {"key": rollup_key, **summarise(bucket["count"], bucket["sums"], bucket["histograms"], metrics)}
+        if series:
+            result["series"] = daily[rollup_key]
+        results.append(result)
+    results.sort(key=lambda item: -item["count"])
+
+    return {"dimension": dimension, "from": start.isoformat(), "days": days, "results": results}
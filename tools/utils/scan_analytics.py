@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Least, TruncDate
+from django.utils.timezone import localdate, localtime, now
+
+from tools.models import SchoolProfileScan
+from tools.utils.analyser import get_latest_scans
+
+
+SCAN_ANALYTICS_CACHE_SECONDS = getattr(settings, "SCAN_ANALYTICS_CACHE_SECONDS", 300)
+SCORE_BUCKET_WIDTH = 10
+MOVERS_LIMIT = 10
+
+
+def score_histogram():
+    """Overall score of the latest scan per school, counted in buckets of SCORE_BUCKET_WIDTH."""
+    buckets = (
+        get_latest_scans()
+        .filter(score__isnull=False)
+        # 100 is folded into the top bucket
+        .annotate(bucket=Least(F("score") / SCORE_BUCKET_WIDTH, 100 // SCORE_BUCKET_WIDTH - 1, output_field=IntegerField()))
+        .values("bucket")
+        .annotate(count=Count("id"))
+    )
+    counts = {row["bucket"]: row["count"] for row in buckets}
+    return [
+        {"low": bucket * SCORE_BUCKET_WIDTH, "high": (bucket + 1) * SCORE_BUCKET_WIDTH, "count": counts.get(bucket, 0)}
+        for bucket in range(100 // SCORE_BUCKET_WIDTH)
+    ]
+
+
+def scan_volume(start):
+    """Scans written per day since `start`, with empty days filled in."""
+    rows = (
+        SchoolProfileScan.objects.filter(created_at__gte=start)
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(count=Count("id"), schools=Count("slug", distinct=True))
+    )
+    by_day = {row["day"]: row for row in rows}
+    days = (localdate(now()) - localdate(start)).days + 1
+    return [
+        {
+            "day": day,
+            "count": by_day.get(day, {}).get("count", 0),
+            "schools": by_day.get(day, {}).get("schools", 0),
+        }
+        for day in (localdate(start) + timedelta(days=offset) for offset in range(days))
+    ]
+
+
+def score_movers(start, limit=MOVERS_LIMIT):
+    """
+    Schools whose latest score moved most compared with their last scan before
+    `start`. Ranking and the limit are applied in the database.
+    """
+    baseline = (
+        SchoolProfileScan.objects.filter(slug=OuterRef("slug"), created_at__lt=start)
+        .order_by("-id").values("score")[:1]
+    )
+    changes = (
+        get_latest_scans()
+        .filter(score__isnull=False)
+        .annotate(before=Subquery(baseline))
+        .filter(before__isnull=False)
+        .annotate(after=F("score"), delta=F("score") - F("before"))
+        .values("slug", "before", "after", "delta")
+    )
+    return {
+        "improved": list(changes.filter(delta__gt=0).order_by("-delta", "slug")[:limit]),
+        "declined": list(changes.filter(delta__lt=0).order_by("delta", "slug")[:limit]),
+    }
+
+
+def get_scan_analytics(days=30):
+    """Summary for the admin analytics page, cached for SCAN_ANALYTICS_CACHE_SECONDS."""
+    cache_key = f"scan-analytics:v1:{days}"
+    summary = cache.get(cache_key)
+    if summary is None:
+        start = localtime(now() - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        summary = {
+            "days": days,
+            "generated_at": now(),
+            "histogram": score_histogram(),
+            "volume": scan_volume(start),
+            "movers": score_movers(start),
+        }
+        cache.set(cache_key, summary, SCAN_ANALYTICS_CACHE_SECONDS)
+    return summary
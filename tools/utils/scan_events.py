@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+from tools.models import SchoolProfileScan
+from tools.utils import metrics
+from tools.utils.analyser import get_latest_scans
+
+logger = logging.getLogger(__name__)
+
+
+SCAN_EVENTS_MAX_SLUGS = getattr(settings, "SCAN_EVENTS_MAX_SLUGS", 20)
+SCAN_EVENTS_MAX_SUBSCRIBERS = getattr(settings, "SCAN_EVENTS_MAX_SUBSCRIBERS", 1000)
+SCAN_EVENTS_HEARTBEAT_SECONDS = getattr(settings, "SCAN_EVENTS_HEARTBEAT_SECONDS", 15)
+# Scans written by other processes are picked up by polling the table this often
+SCAN_EVENTS_POLL_SECONDS = getattr(settings, "SCAN_EVENTS_POLL_SECONDS", 2)
+POLL_BATCH_SIZE = 500
+
+
+class Subscription:
+    """
+    One stream's view of the broker. Undelivered events are conflated per slug,
+    so a consumer that reads slowly gets the latest scan of each school (with a
+    count of skipped ones) instead of an ever-growing queue.
+    """
+
+    def __init__(self, slugs, loop):
+        self.slugs = set(slugs)
+        self.loop = loop
+        self.pending = {}
+        self.skipped = defaultdict(int)
+        self.ready = asyncio.Event()
+
+    def offer(self, event):
+        # Runs on the subscription's event loop
+        slug = event["slug"]
+        replaced = self.pending.get(slug)
+        if replaced is not None:
+            # Keep the delta relative to the last score this consumer was sent
+            previous_score = replaced["previous_score"]
+            event = {
+                **event,
+                "previous_score": previous_score,
+                "delta": event["score"] - previous_score if event["score"] is not None and previous_score is not None else None,
+            }
+            self.skipped[slug] += 1
+            metrics.incr("scan_events.conflated")
+        self.pending[slug] = event
+        self.ready.set()
+
+    async def next_events(self, timeout):
+        """Events ready for delivery, oldest scan first; [] if nothing arrived within `timeout`."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self.ready.clear()
+
+        events = []
+        for event in sorted(self.pending.values(), key=lambda event: event["scan_id"]):
+            skipped = self.skipped.pop(event["slug"], 0)
+            events.append({**event, "skipped": skipped} if skipped else event)
+        self.pending.clear()
+        return events
+
+
+class ScanEventBroker:
+    """
+    In-process fan-out of new scans to SSE subscriptions. Scans written in this
+    process are published from a post-save hook; a polling relay thread picks
+    up scans written by other processes. Each slug's events are only published
+    once and in scan order, whichever path sees them first.
+    """
+
+    def __init__(self, poll_seconds=SCAN_EVENTS_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.subscribers = defaultdict(set)
+        self.latest = {}  # slug -> (scan_id, score) last published
+        self._lock = threading.Lock()
+        self._relay = None
+        self._cursor = None
+
+        metrics.register_gauge("scan_events.subscribers", self.subscriber_count)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscription for subscriptions in self.subscribers.values() for subscription in subscriptions})
+
+    def wants(self, slug):
+        with self._lock:
+            return bool(self.subscribers.get(slug))
+
+    def subscribe(self, slugs, loop):
+        subscription = Subscription(slugs, loop)
+        with self._lock:
+            for slug in slugs:
+                self.subscribers[slug].add(subscription)
+            self._start_relay()
+        metrics.incr("scan_events.subscribed")
+        return subscription
+
+    def seed(self, max_scan_id, rows):
+        """
+        Record the scans a new subscription starts from (loaded after subscribing,
+        so nothing written in between is missed) and where polling starts.
+        """
+        with self._lock:
+            for scan_id, slug, score, *_ in rows:
+                if scan_id > self.latest.get(slug, (0, None))[0]:
+                    self.latest[slug] = (scan_id, score)
+            if self._cursor is None:
+                self._cursor = max_scan_id
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for slug in subscription.slugs:
+                subscribers = self.subscribers.get(slug)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[slug]
+                    self.latest.pop(slug, None)
+            if not self.subscribers:
+                # The next subscription starts polling from its own snapshot
+                self._cursor = None
+
+    def publish(self, scan_id, slug, score, created_at, scores=None):
+        with self._lock:
+            subscriptions = list(self.subscribers.get(slug, ()))
+            last_id, previous_score = self.latest.get(slug, (0, None))
+            if not subscriptions or scan_id <= last_id:
+                return
+            self.latest[slug] = (scan_id, score)
+
+        event = {
+            "slug": slug,
+            "scan_id": scan_id,
+            "score": score,
+            "previous_score": previous_score,
+            "delta": score - previous_score if score is not None and previous_score is not None else None,
+            "created_at": created_at,
+            "scores": scores,
+        }
+        metrics.incr("scan_events.published")
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The stream's event loop is gone; its generator cleanup will unsubscribe it
+                pass
+
+    def _start_relay(self):
+        if self._relay is None and self.poll_seconds:
+            self._relay = threading.Thread(target=self._poll_forever, name="scan-events-relay", daemon=True)
+            self._relay.start()
+
+    def poll(self):
+        """Publish scans of subscribed slugs written since the last poll (by any process)."""
+        with self._lock:
+            slugs = list(self.subscribers)
+            cursor = self._cursor
+        if not slugs or cursor is None:
+            return
+        try:
+            rows = list(
+                SchoolProfileScan.objects.filter(id__gt=cursor, slug__in=slugs)
+                .order_by("id")
+                .values_list("id", "slug", "score", "created_at", "analysis__scores")[:POLL_BATCH_SIZE]
+            )
+        finally:
+            connections.close_all()
+
+        for scan_id, slug, score, created_at, scores in rows:
+            with self._lock:
+                if self._cursor != cursor:
+                    # Reset by unsubscribe() (and maybe re-seeded) while we were reading
+                    return
+                self._cursor = cursor = scan_id
+            self.publish(scan_id, slug, score, created_at, scores)
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Polling for new scans failed")
+
+
+scan_event_broker = ScanEventBroker()
+
+
+def publish_scan(scan):
+    if scan_event_broker.wants(scan.slug):
+        # Same value the polling relay reads back (the column truncates fractional scores)
+        score = SchoolProfileScan._meta.get_field("score").to_python(scan.score)
+        scan_event_broker.publish(scan.id, scan.slug, score, scan.created_at, scan.analysis.get("scores"))
+
+
+def load_snapshot(slugs):
+    """
+    Newest scan id overall, and the latest (scan_id, slug, score, created_at,
+    scores) per slug for a new stream's first events.
+    """
+    try:
+        max_scan_id = SchoolProfileScan.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        rows = list(
+            get_latest_scans(slugs).order_by("id")
+            .values_list("id", "slug", "score", "created_at", "analysis__scores")
+        )
+        return max_scan_id, rows
+    finally:
+        connections.close_all()
+
+
+def format_event(event, name="scan"):
+    return f"id: {event['scan_id']}\nevent: {name}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
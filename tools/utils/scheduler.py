@@ -0,0 +1,204 @@
+import heapq
+import logging
+import math
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.timezone import now
+
+from tools.models import SchoolProfileScan
+from tools.utils.analyser import scan_school_profile
+from tools.utils.ratelimit import TokenBucket
+from tools.utils.rescoring import stored_score
+
+logger = logging.getLogger(__name__)
+
+
+MIN_RESCAN_INTERVAL = timedelta(hours=getattr(settings, "RESCAN_MIN_INTERVAL_HOURS", 6))
+MAX_RESCAN_INTERVAL = timedelta(days=getattr(settings, "RESCAN_MAX_INTERVAL_DAYS", 30))
+DEFAULT_RESCAN_INTERVAL = timedelta(days=3)
+RESCAN_BUDGET_PER_MINUTE = getattr(settings, "RESCAN_BUDGET_PER_MINUTE", 30)
+HISTORY_SCANS = 20  # scans per slug used to estimate volatility
+
+
+def compute_rescan_interval(history):
+    """
+    How long to wait before re-scanning a school, from its scan history
+    (newest first, as (created_at, score, view_count) tuples).
+
+    Schools whose score changes often, by a lot, or that many parents view are
+    re-scanned sooner; schools that never change back off towards the maximum.
+    """
+    if len(history) < 2:
+        return DEFAULT_RESCAN_INTERVAL
+
+    chronological = list(reversed(history))
+    deltas = [abs((b[1] or 0) - (a[1] or 0)) for a, b in zip(chronological, chronological[1:])]
+    change_times = [b[0] for a, b, delta in zip(chronological, chronological[1:], deltas) if delta]
+
+    if len(change_times) >= 2:
+        gaps = [(b - a).total_seconds() for a, b in zip(change_times, change_times[1:])]
+        # Look again at about half the typical time between changes
+        interval = statistics.median(gaps) / 2
+    elif change_times:
+        interval = (history[0][0] - change_times[0]).total_seconds() or DEFAULT_RESCAN_INTERVAL.total_seconds()
+    else:
+        # Never changed: back off to twice the span already observed without a change
+        interval = 2 * (history[0][0] - history[-1][0]).total_seconds()
+
+    volatility = statistics.mean(deltas)
+    interval /= 1 + volatility / 5
+
+    view_count = history[0][2] or 0
+    try:
+        interval /= 1 + math.log10(1 + float(view_count)) / 4
+    except (TypeError, ValueError):
+        pass
+
+    interval = timedelta(seconds=interval)
+    return max(MIN_RESCAN_INTERVAL, min(MAX_RESCAN_INTERVAL, interval))
+
+
+def load_scan_history(slugs=None):
+    """
+    Latest HISTORY_SCANS (created_at, score, view_count) per slug, newest first.
+    Older scans are cut off in the query, so only the window the schedule needs is read.
+    """
+    scans = SchoolProfileScan.objects.all()
+    if slugs is not None:
+        scans = scans.filter(slug__in=slugs)
+    rows = (
+        scans.annotate(recency=Window(RowNumber(), partition_by=F("slug"), order_by=F("created_at").desc()))
+        .filter(recency__lte=HISTORY_SCANS)
+        .order_by("slug", "-created_at")
+        .values_list("slug", "created_at", "score", "analysis__data_insights__view_count")
+    )
+
+    history = {}
+    for slug, created_at, score, view_count in rows.iterator(chunk_size=2000):
+        history.setdefault(slug, []).append((created_at, score, view_count))
+    return history
+
+
+def next_due(history):
+    return history[0][0] + compute_rescan_interval(history)
+
+
+class RescanScheduler:
+    """
+    Keeps every known slug in a priority queue ordered by its next due time and
+    dispatches due scans to a worker pool, never exceeding `budget_per_minute`
+    upstream requests.
+    """
+
+    def __init__(self, budget_per_minute=RESCAN_BUDGET_PER_MINUTE, workers=4, stdout=None):
+        self.budget = TokenBucket(rate=budget_per_minute / 60, capacity=max(1, budget_per_minute // 6))
+        self.workers = workers
+        self.queue = []
+        self.scheduled = {}
+        self.missing = set()  # slugs no longer found upstream
+        self.scanned = 0
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+        logger.info(message)
+
+    def schedule(self, slug, due_at):
+        if self.scheduled.get(slug) == due_at:
+            return
+        self.scheduled[slug] = due_at
+        heapq.heappush(self.queue, (due_at, slug))
+
+    def load(self, in_flight=()):
+        for slug, history in load_scan_history().items():
+            if slug not in in_flight and slug not in self.missing:
+                self.scheduled[slug] = next_due(history)
+        # Rebuilt rather than pushed onto, so superseded entries don't pile up across reloads
+        self.queue = [(due_at, slug) for slug, due_at in self.scheduled.items()]
+        heapq.heapify(self.queue)
+        self.log(f"Scheduled {len(self.scheduled)} schools")
+
+    def pop_due(self, current_time):
+        while self.queue and self.queue[0][0] <= current_time:
+            due_at, slug = heapq.heappop(self.queue)
+            # Skip entries superseded by a later reschedule
+            if self.scheduled.get(slug) == due_at:
+                del self.scheduled[slug]
+                return slug
+        return None
+
+    def rescan(self, slug):
+        close_old_connections()
+        try:
+            # Someone may have scanned the school since it was queued
+            history = load_scan_history([slug]).get(slug, [])
+            if history and next_due(history) > now():
+                return slug, next_due(history), False
+
+            self.budget.acquire()
+            scan = scan_school_profile(slug, check_media=True)
+            if scan is None:
+                return slug, None, False
+            view_count = scan.analysis.get("data_insights", {}).get("view_count")
+            # The new scan plus the history already read, instead of loading it again
+            history = [(scan.created_at, stored_score(scan.score), view_count)] + history[:HISTORY_SCANS - 1]
+            return slug, next_due(history), True
+        finally:
+            close_old_connections()
+
+    def run(self, once=False, max_idle_seconds=60, reload_every=timedelta(minutes=15)):
+        self.load()
+        reload_at = now() + reload_every
+        in_flight = {}  # future -> slug
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                if not once and now() >= reload_at:
+                    # Pick up schools first scanned elsewhere and scans made outside the scheduler
+                    self.load(in_flight=set(in_flight.values()))
+                    reload_at = now() + reload_every
+
+                for future in [f for f in in_flight if f.done()]:
+                    slug = in_flight.pop(future)
+                    try:
+                        slug, due_at, scanned = future.result()
+                    except Exception as e:
+                        self.log(f"{slug}: re-scan failed ({e}), retrying later")
+                        self.schedule(slug, now() + MIN_RESCAN_INTERVAL)
+                        continue
+                    if scanned:
+                        self.scanned += 1
+                        self.log(f"{slug}: re-scanned, next due {due_at:%Y-%m-%d %H:%M}")
+                    if due_at is None:
+                        self.log(f"{slug}: not found upstream, dropped from the schedule")
+                        self.missing.add(slug)
+                        continue
+                    self.schedule(slug, due_at)
+
+                slug = self.pop_due(now()) if len(in_flight) < self.workers else None
+                if slug:
+                    in_flight[pool.submit(self.rescan, slug)] = slug
+                    continue
+
+                if in_flight:
+                    wait(in_flight, timeout=1, return_when=FIRST_COMPLETED)
+                    continue
+
+                if once:
+                    break
+
+                sleep_for = max_idle_seconds
+                if self.queue:
+                    sleep_for = min(sleep_for, max(0, (self.queue[0][0] - now()).total_seconds()))
+                time.sleep(sleep_for)
+
+    def upcoming(self, limit=20):
+        return heapq.nsmallest(limit, ((due_at, slug) for slug, due_at in self.scheduled.items()))
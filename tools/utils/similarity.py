@@ -0,0 +1,131 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from tools.models import ContentSignature, ContentSignatureBand, SchoolProfileScan
+
+
+# Free-text fields that schools tend to copy from each other or from templates
+SIGNATURE_FIELDS = ["about", "usp", "awards"]
+
+SHINGLE_SIZE = 3  # words per shingle
+MIN_WORDS = 15  # shorter texts are too generic to call duplicates
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+DUPLICATE_THRESHOLD = getattr(settings, "DUPLICATE_CONTENT_THRESHOLD", 0.8)
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_rng = np.random.default_rng(20240601)  # fixed seed keeps signatures comparable across processes
+_PERM_A = _rng.integers(1, 2**32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 4294967311, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingle_text(text):
+    words = _WORD_RE.findall(_TAG_RE.sub(" ", str(text)).lower())
+    if len(words) < MIN_WORDS:
+        return set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(shingles):
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p for every permutation and shingle, then the minimum per permutation
+    permuted = ((np.outer(_PERM_A, hashes) % _PRIME) + _PERM_B[:, None]) % _PRIME
+    return permuted.min(axis=1).tolist()
+
+
+def compute_content_signatures(data):
+    """MinHash signature per free-text field; fields too short to compare are skipped."""
+    signatures = {}
+    for field in SIGNATURE_FIELDS:
+        value = data.get(field)
+        if not value:
+            continue
+        shingles = shingle_text(value)
+        if shingles:
+            signatures[field] = minhash_signature(shingles)
+    return signatures
+
+
+def lsh_buckets(signature):
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.md5(",".join(map(str, rows)).encode()).hexdigest()[:16]
+        buckets.append(f"{band}:{digest}")
+    return buckets
+
+
+def estimate_similarity(signature_a, signature_b):
+    a = np.asarray(signature_a)
+    b = np.asarray(signature_b)
+    if a.shape != b.shape:
+        return 0.0
+    return float((a == b).mean())
+
+
+def find_near_duplicates(signatures, exclude_slug=None, threshold=None, limit=10):
+    """
+    Find schools whose latest indexed content is a near-duplicate of `signatures`.
+    Candidates come from LSH bucket collisions (an indexed lookup per field) and are
+    then verified against the estimated Jaccard similarity of their full signatures.
+    """
+    threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+    matches = {}
+
+    for field, signature in signatures.items():
+        candidates = ContentSignatureBand.objects.filter(field=field, bucket__in=lsh_buckets(signature))
+        if exclude_slug:
+            candidates = candidates.exclude(signature__slug=exclude_slug)
+        candidate_ids = candidates.values("signature_id").distinct()
+
+        for slug, other in ContentSignature.objects.filter(id__in=candidate_ids).values_list("slug", "signature"):
+            similarity = estimate_similarity(signature, other)
+            if similarity < threshold:
+                continue
+            fields = matches.setdefault(slug, {})
+            fields[field] = max(similarity, fields.get(field, 0))
+
+    duplicates = [
+        {"slug": slug, "fields": fields, "similarity": round(max(fields.values()), 3)}
+        for slug, fields in matches.items()
+    ]
+    duplicates.sort(key=lambda d: (-d["similarity"], -len(d["fields"]), d["slug"]))
+    return duplicates[:limit]
+
+
+def find_duplicates_for_slug(slug, threshold=None, limit=10):
+    latest_scan_id = (
+        SchoolProfileScan.objects.filter(slug=slug).order_by("-created_at").values_list("id", flat=True).first()
+    )
+    if latest_scan_id is None:
+        return None
+
+    signatures = dict(ContentSignature.objects.filter(scan_id=latest_scan_id).values_list("field", "signature"))
+    return find_near_duplicates(signatures, exclude_slug=slug, threshold=threshold, limit=limit)
+
+
+def store_content_signatures(scan, signatures):
+    """Persist signatures with the scan and move the slug's LSH bands to this scan."""
+    with transaction.atomic():
+        ContentSignatureBand.objects.filter(signature__slug=scan.slug).delete()
+        for field, signature in signatures.items():
+            content_signature = ContentSignature.objects.create(
+                scan=scan,
+                slug=scan.slug,
+                field=field,
+                signature=signature,
+            )
+            ContentSignatureBand.objects.bulk_create([
+                ContentSignatureBand(signature=content_signature, field=field, bucket=bucket)
+                for bucket in lsh_buckets(signature)
+            ])
@@ -0,0 +1,164 @@
+import numpy as np
+
+from tools.utils.analyser import OVERALL_SCORE_WEIGHTS, get_latest_scans
+
+
+# Sub-scores stored in analysis["scores"] that a candidate weight vector may use
+SIMULATION_DIMENSIONS = [
+    "profile_completeness_score",
+    "data_quality_score",
+    "content_richness_score",
+    "visual_content_score",
+    "contact_accessibility_score",
+    "academic_information_score",
+    "infrastructure_score",
+    "fee_completeness_score",
+]
+
+PERCENTILES = [10, 25, 50, 75, 90]
+HISTOGRAM_BINS = np.linspace(0, 100, 11)
+
+
+def load_score_matrix():
+    """
+    Load the stored sub-scores of the latest scan per school into a matrix.
+    Returns (slugs, n x len(SIMULATION_DIMENSIONS) matrix).
+    Only the small JSON keys are selected so the full analysis blobs are never decoded.
+    """
+    rows = get_latest_scans().values_list("slug", "analysis__scores")
+
+    slugs = []
+    matrix = []
+    for slug, scores in rows.iterator(chunk_size=2000):
+        if not isinstance(scores, dict):
+            continue
+        slugs.append(slug)
+        matrix.append([scores.get(dim) or 0 for dim in SIMULATION_DIMENSIONS])
+
+    matrix = np.asarray(matrix, dtype=np.float64).reshape(len(slugs), len(SIMULATION_DIMENSIONS))
+    return slugs, np.clip(matrix, 0, 100)
+
+
+def build_weight_vector(weights):
+    unknown = set(weights) - set(SIMULATION_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown score dimensions: {', '.join(sorted(unknown))}")
+
+    vector = np.array([float(weights.get(dim, 0)) for dim in SIMULATION_DIMENSIONS], dtype=np.float64)
+    if not np.isfinite(vector).all():
+        raise ValueError("Weights must be finite numbers")
+    if (vector < 0).any():
+        raise ValueError("Weights must be non-negative")
+    total = vector.sum()
+    if total <= 0:
+        raise ValueError("At least one weight must be positive")
+
+    # Keep simulated scores on the same 0-100 scale as overall_score
+    return vector / total
+
+
+def rank_scores(scores):
+    """Competition ranking (1 = best); tied schools share a rank."""
+    ascending = np.sort(scores)
+    return 1 + len(scores) - np.searchsorted(ascending, scores, side="right")
+
+
+def describe_distribution(scores):
+    if not len(scores):
+        return {"count": 0}
+
+    histogram, _ = np.histogram(scores, bins=HISTOGRAM_BINS)
+    return {
+        "count": int(len(scores)),
+        "mean": round(float(scores.mean()), 2),
+        "std": round(float(scores.std()), 2),
+        "min": round(float(scores.min()), 2),
+        "max": round(float(scores.max()), 2),
+        "percentiles": {
+            f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(scores, PERCENTILES))
+        },
+        "histogram": {
+            f"{int(lo)}-{int(hi)}": int(count)
+            for lo, hi, count in zip(HISTOGRAM_BINS[:-1], HISTOGRAM_BINS[1:], histogram)
+        },
+    }
+
+
+def distribution_shift(before, after):
+    if not before.get("count"):
+        return {}
+    return {
+        "mean": round(after["mean"] - before["mean"], 2),
+        "std": round(after["std"] - before["std"], 2),
+        "percentiles": {
+            key: round(after["percentiles"][key] - value, 2)
+            for key, value in before["percentiles"].items()
+        },
+    }
+
+
+def simulate_weights(candidates, top=20):
+    """
+    Recompute overall scores and ranks for each candidate weight vector against the
+    stored scores of the latest scan per school.
+
+    `candidates` is a list of {"name": str, "weights": {dimension: weight}}.
+    The baseline applies the live OVERALL_SCORE_WEIGHTS to the same sub-scores, so
+    submitting the current weights changes nothing, whichever rules version the
+    stored overall_score was computed under.
+    """
+    if not candidates:
+        raise ValueError("Provide at least one candidate weight vector")
+
+    names = [c.get("name") or f"candidate_{i + 1}" for i, c in enumerate(candidates)]
+    weight_matrix = np.column_stack([build_weight_vector(c.get("weights") or {}) for c in candidates])
+
+    slugs, matrix = load_score_matrix()
+
+    # One pass for every candidate: (schools x dimensions) @ (dimensions x candidates)
+    simulated = np.round(matrix @ weight_matrix, 1)
+    baseline = np.round(matrix @ build_weight_vector(OVERALL_SCORE_WEIGHTS), 1)
+
+    baseline_ranks = rank_scores(baseline)
+    baseline_distribution = describe_distribution(baseline)
+
+    results = []
+    for index, name in enumerate(names):
+        scores = simulated[:, index]
+        ranks = rank_scores(scores)
+        rank_delta = baseline_ranks - ranks  # positive = moved up
+        distribution = describe_distribution(scores)
+
+        movers = np.argsort(-np.abs(rank_delta), kind="stable")[:top]
+        top_movers = [
+            {
+                "slug": slugs[i],
+                "baseline_score": round(float(baseline[i]), 1),
+                "simulated_score": float(scores[i]),
+                "baseline_rank": int(baseline_ranks[i]),
+                "simulated_rank": int(ranks[i]),
+                "rank_change": int(rank_delta[i]),
+            }
+            for i in movers
+            if rank_delta[i] != 0
+        ]
+
+        results.append({
+            "name": name,
+            "weights": dict(zip(SIMULATION_DIMENSIONS, np.round(weight_matrix[:, index], 4).tolist())),
+            "distribution": distribution,
+            "shift": distribution_shift(baseline_distribution, distribution),
+            "rank_changes": {
+                "schools_moved": int(np.count_nonzero(rank_delta)),
+                "mean_abs_change": round(float(np.abs(rank_delta).mean()), 2) if len(slugs) else 0,
+                "max_abs_change": int(np.abs(rank_delta).max()) if len(slugs) else 0,
+            },
+            "top_movers": top_movers,
+        })
+
+    return {
+        "schools": len(slugs),
+        "current_weights": OVERALL_SCORE_WEIGHTS,
+        "baseline": baseline_distribution,
+        "candidates": results,
+    }
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from tools.models.base import Tool
+from tools.serializers.base import ToolSerializer
+from tools.utils import metrics
+
+
+VERSION_CACHE_KEY = "tools:registry:version"
+# Without a shared cache backend an invalidation only reaches the process that made it;
+# other processes pick up changes once their copy of the version expires
+REGISTRY_VERSION_TIMEOUT = getattr(settings, "TOOL_REGISTRY_VERSION_SECONDS", 60)
+
+# base url -> (version, etag, data); logo URLs are absolute so payloads differ per host
+_local_registry = {}
+_lock = threading.Lock()
+
+
+def get_registry_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_CACHE_KEY, version, REGISTRY_VERSION_TIMEOUT):
+            version = cache.get(VERSION_CACHE_KEY, version)
+    return version
+
+
+def invalidate_tool_registry():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, REGISTRY_VERSION_TIMEOUT)
+    with _lock:
+        _local_registry.clear()
+
+
+def get_active_tools(request):
+    """
+    Serialized active tools and their ETag. Served from process memory, then the
+    cache, and rebuilt from the DB after a Tool is saved or deleted in this process
+    (or, with a shared cache, any process) or once the registry version expires.
+    """
+    version = get_registry_version()
+    base_url = request.build_absolute_uri("/")
+
+    entry = _local_registry.get(base_url)
+    if entry and entry[0] == version:
+        metrics.incr("tool_registry.hit")
+        return entry[1], entry[2]
+
+    shared_key = f"tools:registry:{version}:{hashlib.md5(base_url.encode()).hexdigest()}"
+    shared = cache.get(shared_key)
+    if shared:
+        metrics.incr("tool_registry.hit")
+        etag, data = shared
+    else:
+        metrics.incr("tool_registry.miss")
+        tools = Tool.objects.filter(is_active=True)
+        data = ToolSerializer(tools, many=True, context={"request": request}).data
+        data = json.loads(json.dumps(data))
+        etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        # Unreachable once the version it is keyed on expires
+        cache.set(shared_key, (etag, data), REGISTRY_VERSION_TIMEOUT)
+
+    with _lock:
+        _local_registry[base_url] = (version, etag, data)
+    return etag, data
@@ -1,27 +1,199 @@
+import math
+
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from tools.serializers.analyser import SchoolProfileScanSerializer
-from tools.models.analyser import SchoolProfileScan
-from tools.utils.analyser import analyse_school_profile, run_complete_school_analysis
-import requests
+from tools.utils.admission import AdmissionControlMixin, AdmissionRejected, admitted, rejection_response
+from tools.utils.analyser import scan_school_profile
+from tools.utils.comparison import COMPARISON_MAX_AGE_HOURS, compare_schools
+from tools.utils.geo import get_spatial_index
+from tools.utils.notifications import change_notifications, parse_change_events, verify_signature
+from tools.utils.revalidate import (
+    ANALYSER_FRESH_SECONDS,
+    ANALYSER_STALE_SECONDS,
+    read_stored_scan,
+    revalidate,
+    scan_age_seconds,
+)
+from tools.utils.rollups import get_aggregates
+from tools.utils.similarity import find_duplicates_for_slug
+from tools.utils.simulation import simulate_weights
+
+class SchoolAnalyserAPIView(AdmissionControlMixin, APIView):
+    def admission_exempt(self, request):
+        # Reads are admitted only if they end up having to scan
+        return request.GET.get("mode") == "read"
 
-class SchoolAnalyserAPIView(APIView):
     def get(self, request, slug):
-        url = f"https://api.main.ezyschooling.com/api/v3/schools/{slug}/"
-        res = requests.get(url)
+        if request.query_params.get("mode") == "read":
+            return self.read(request, slug)
+
+        scan = scan_school_profile(slug)
 
-        if res.status_code != 200:
+        if scan is None:
             return Response({"error": "School not found"}, status=404)
 
-        data = res.json()
-        analysis = run_complete_school_analysis(slug, data)
+        serializer = SchoolProfileScanSerializer(scan)
+        return Response(serializer.data)
 
-        scan = SchoolProfileScan.objects.create(
-            slug=slug,
-            score=analysis.get("overall_score", 0),
-            analysis=analysis,
+    def read(self, request, slug):
+        """Serve the stored scan when it is recent enough, refreshing stale ones in the background."""
+        scan, freshness = read_stored_scan(slug)
+        if freshness is None:
+            try:
+                with admitted(request):
+                    scan, freshness = revalidate(slug, stored=scan)
+            except AdmissionRejected as e:
+                return rejection_response(e)
+        if scan is None:
+            return Response({"error": "School not found"}, status=404)
+
+        last_modified = int(scan.created_at.timestamp())
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if if_modified_since is not None and last_modified <= if_modified_since:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(SchoolProfileScanSerializer(scan).data)
+
+        age = scan_age_seconds(scan)
+        response["Age"] = str(age)
+        response["Last-Modified"] = http_date(last_modified)
+        # Caches subtract Age from max-age themselves
+        response["Cache-Control"] = (
+            f"max-age={ANALYSER_FRESH_SECONDS}, "
+            f"stale-while-revalidate={ANALYSER_STALE_SECONDS - ANALYSER_FRESH_SECONDS}"
         )
+        response["X-Scan-Freshness"] = freshness
+        return response
 
-        serializer = SchoolProfileScanSerializer(scan)
-        return Response(serializer.data)
+
+class SchoolComparisonAPIView(AdmissionControlMixin, APIView):
+    def get(self, request):
+        slugs = [slug.strip() for slug in request.query_params.get("slugs", "").split(",") if slug.strip()]
+        try:
+            max_age_hours = float(request.query_params.get("max_age_hours", COMPARISON_MAX_AGE_HOURS))
+            result = compare_schools(
+                slugs,
+                max_age_hours=max_age_hours,
+                refresh=request.query_params.get("refresh") in ("1", "true"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not result["schools"]:
+            return Response({"error": "None of the schools were found", "errors": result["errors"]}, status=404)
+
+        return Response(result)
+
+
+class ChangeNotificationAPIView(APIView):
+    def post(self, request):
+        if not verify_signature(request.body, request.headers.get("X-Signature")):
+            return Response({"error": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            events = parse_change_events(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = {"queued": 0, "coalesced": 0, "duplicate": 0, "rejected": 0}
+        for slug, event_id in events:
+            results[change_notifications.notify(slug, event_id)] += 1
+
+        return Response({**results, **change_notifications.status()}, status=status.HTTP_202_ACCEPTED)
+
+
+class WeightSimulationAPIView(APIView):
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Send a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+
+        top = request.data.get("top", 20)
+        if isinstance(top, bool) or not isinstance(top, (int, str)) or not str(top).strip().isdigit() or not 1 <= int(top) <= 1000:
+            return Response({"error": "'top' must be an integer from 1 to 1000."}, status=status.HTTP_400_BAD_REQUEST)
+
+        candidates = request.data.get("candidates")
+        if candidates is None and request.data.get("weights"):
+            candidates = [{"name": "candidate", "weights": request.data.get("weights")}]
+
+        if not isinstance(candidates, list) or not all(isinstance(c, dict) for c in candidates):
+            return Response({"error": "Provide 'candidates' as a list of {name, weights} objects."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = simulate_weights(candidates, top=int(top))
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
+
+
+class SchoolDuplicatesAPIView(APIView):
+    def get(self, request, slug):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+            threshold = request.query_params.get("threshold")
+            threshold = float(threshold) if threshold is not None else None
+        except ValueError:
+            return Response({"error": "limit and threshold must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if threshold is not None and not (math.isfinite(threshold) and 0 <= threshold <= 1):
+            return Response({"error": "threshold must be a number between 0 and 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        duplicates = find_duplicates_for_slug(slug, threshold=threshold, limit=limit)
+        if duplicates is None:
+            return Response({"error": "No scans found for this school"}, status=404)
+
+        return Response({"slug": slug, "duplicates": duplicates})
+
+
+class NearbySchoolsAPIView(APIView):
+    def get(self, request):
+        try:
+            latitude = float(request.query_params["lat"])
+            longitude = float(request.query_params["lon"])
+            radius_km = float(request.query_params.get("radius_km", 5))
+            limit = min(max(int(request.query_params.get("limit", 200)), 1), 1000)
+        except (KeyError, ValueError):
+            return Response({"error": "lat and lon are required; radius_km and limit must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(math.isfinite(value) for value in (latitude, longitude, radius_km)):
+            return Response({"error": "lat, lon and radius_km must be finite numbers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            return Response({"error": "lat must be within [-90, 90] and lon within [-180, 180]."}, status=status.HTTP_400_BAD_REQUEST)
+        if radius_km <= 0:
+            return Response({"error": "radius_km must be greater than 0."}, status=status.HTTP_400_BAD_REQUEST)
+        radius_km = min(radius_km, 100)
+
+        results = get_spatial_index().within_radius(latitude, longitude, radius_km, limit=limit)
+        return Response({
+            "count": len(results),
+            "results": [
+                {
+                    "slug": slug,
+                    "latitude": point[0],
+                    "longitude": point[1],
+                    "distance_km": round(distance, 3),
+                    "overall_score": point[2],
+                }
+                for distance, slug, point in results
+            ],
+        })
+
+
+class ScoreAggregatesAPIView(APIView):
+    def get(self, request):
+        dimension = request.query_params.get("dimension", "district")
+        metrics = request.query_params.get("metrics")
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+            result = get_aggregates(
+                dimension,
+                days=days,
+                key=request.query_params.get("key"),
+                metrics=metrics.split(",") if metrics else None,
+                series=request.query_params.get("series") in ("1", "true"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
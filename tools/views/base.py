@@ -1,7 +1,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from tools.models.base import Tool
-from tools.serializers.base import ToolSerializer
+from rest_framework import status
+from django.utils.http import parse_etags
+from tools.utils.health import deep_health, readiness
+from tools.utils.tool_registry import get_active_tools
+from tools.utils import metrics
 
     
 class HealthCheckAPIView(APIView):
@@ -9,10 +12,59 @@ class HealthCheckAPIView(APIView):
     permission_classes = []
 
     def get(self, request):
+        if request.query_params.get("deep") in ("1", "true"):
+            return DeepHealthCheckAPIView().get(request)
         return Response({"status": "ok", "message": "Echo backend is running."})
 
+
+class LivenessAPIView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response({"status": "ok"})
+
+
+class ReadinessAPIView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        ready, checks = readiness()
+        return Response(
+            {"status": "ok" if ready else "unavailable", "checks": checks},
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class DeepHealthCheckAPIView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        ready, checks = deep_health()
+        return Response(
+            {"status": "ok" if ready else "unavailable", "checks": checks, "metrics": metrics.snapshot()},
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+class MetricsAPIView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+
 class ToolListAPIView(APIView):
     def get(self, request):
-        tools = Tool.objects.filter(is_active=True)
-        serializer = ToolSerializer(tools, many=True, context={'request': request})
-        return Response(serializer.data)
\ No newline at end of file
+        etag, data = get_active_tools(request)
+        # Weak comparison, as If-None-Match requires
+        client_etags = [tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))]
+        if etag in client_etags or "*" in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
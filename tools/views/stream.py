@@ -0,0 +1,87 @@
+import asyncio
+import re
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from tools.utils import metrics
+from tools.utils.scan_events import (
+    SCAN_EVENTS_HEARTBEAT_SECONDS,
+    SCAN_EVENTS_MAX_SLUGS,
+    SCAN_EVENTS_MAX_SUBSCRIBERS,
+    format_event,
+    load_snapshot,
+    scan_event_broker,
+)
+
+SLUG_RE = re.compile(r"^[-\w]+$")
+
+
+async def scan_event_stream(subscription, snapshot, last_event_id):
+    sent = {}  # slug -> last scan id sent, so snapshot and live events never repeat
+    try:
+        yield "retry: 5000\n\n"
+        for scan_id, slug, score, created_at, scores in snapshot:
+            sent[slug] = scan_id
+            if scan_id > last_event_id:
+                yield format_event(
+                    {"slug": slug, "scan_id": scan_id, "score": score, "created_at": created_at, "scores": scores},
+                    name="snapshot",
+                )
+
+        while True:
+            events = await subscription.next_events(SCAN_EVENTS_HEARTBEAT_SECONDS)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                if event["scan_id"] <= sent.get(event["slug"], 0):
+                    continue
+                sent[event["slug"]] = event["scan_id"]
+                metrics.incr("scan_events.delivered")
+                yield format_event(event)
+    finally:
+        scan_event_broker.unsubscribe(subscription)
+
+
+class ScanEventStreamView(View):
+    """
+    Server-Sent Events stream of new scans for ?slugs=a,b,c: the latest stored
+    scan of each school first, then every new scan with its score delta.
+    Only served by the ASGI app: under WSGI Django drains an async streaming
+    response into a buffer, so the stream would never flush or end.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"error": "Scan streams are only available from the ASGI server."}, status=501)
+        slugs = list(dict.fromkeys(slug.strip() for slug in request.GET.get("slugs", "").split(",") if slug.strip()))
+        if not slugs or len(slugs) > SCAN_EVENTS_MAX_SLUGS or not all(SLUG_RE.match(slug) for slug in slugs):
+            return JsonResponse({"error": f"Provide 1 to {SCAN_EVENTS_MAX_SLUGS} comma-separated slugs."}, status=400)
+        if scan_event_broker.subscriber_count() >= SCAN_EVENTS_MAX_SUBSCRIBERS:
+            response = JsonResponse({"error": "Too many open streams"}, status=503)
+            response["Retry-After"] = "30"
+            return response
+
+        try:
+            last_event_id = int(request.headers.get("Last-Event-ID", 0))
+        except ValueError:
+            last_event_id = 0
+
+        subscription = scan_event_broker.subscribe(slugs, asyncio.get_running_loop())
+        try:
+            max_scan_id, snapshot = await sync_to_async(load_snapshot, thread_sensitive=False)(slugs)
+        except Exception:
+            scan_event_broker.unsubscribe(subscription)
+            raise
+        scan_event_broker.seed(max_scan_id, snapshot)
+
+        response = StreamingHttpResponse(
+            scan_event_stream(subscription, snapshot, last_event_id),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response